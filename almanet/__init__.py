@@ -2,12 +2,14 @@ from . import _clients as clients
 from . import _shared as shared
 
 from ._session import *
+from ._autoscaling import *
 from ._package import *
 from ._service import *
 
 __all__ = [
     "clients",
     "shared",
+    *_autoscaling.__all__,
     *_package.__all__,
     *_service.__all__,
     *_session.__all__,
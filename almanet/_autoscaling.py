@@ -0,0 +1,133 @@
+import asyncio
+import json
+import typing
+import urllib.request
+
+from . import (
+    _service,
+    _session,
+    _shared,
+)
+
+__all__ = [
+    "backlog_probe",
+    "autoscaling_model",
+    "nsqd_stats_probe",
+    "consumer_lag_probe",
+]
+
+# returns the backlog of the service or None if it is unknown,
+# receives the latest consumer lag in seconds reported by each worker of the service
+type backlog_probe = typing.Callable[[_service.remote_service, list[float]], float | None]
+
+
+@_shared.dataclass(slots=True)
+class autoscaling_model:
+    """
+    Scales the number of workers of each service between `service.workers` and `service.max_workers`.
+
+    Args:
+    - probe: measures the backlog of the service.
+    - scale_up_threshold: adds a worker while the backlog is above.
+    - scale_down_threshold: removes a worker while the backlog is at or below.
+    - interval: seconds between probes.
+    - cooldown: seconds after scaling before a worker can be removed.
+    """
+
+    probe: backlog_probe
+    scale_up_threshold: float
+    scale_down_threshold: float = 0
+    interval: float = 5
+    cooldown: float = 30
+
+    def __post_init__(self):
+        if self.scale_down_threshold >= self.scale_up_threshold:
+            raise ValueError("scale_down_threshold must be less than scale_up_threshold")
+
+
+def _service_topics(
+    service: _service.remote_service,
+) -> dict[str, set[str]]:
+    topics: dict[str, set[str]] = {}
+    for procedure in service.procedures:
+        # procedures of a multiplexed service share the topic of the service
+        topics.setdefault(f"_rpc_.{procedure._via or procedure.uri}", set()).add(procedure.channel)
+    return topics
+
+
+def nsqd_stats_probe(
+    *http_addresses: str,
+    timeout: float = 1,
+) -> backlog_probe:
+    """
+    Returns a probe that counts messages waiting in the topics and channels of the service,
+    using `/stats` endpoint of each nsqd.
+
+    Args:
+    - http_addresses: nsqd HTTP addresses, for example "localhost:4151".
+    """
+    if len(http_addresses) == 0:
+        raise ValueError("must provide at least one address")
+
+    urls = [f"{a if '://' in a else f'http://{a}'}/stats?format=json" for a in http_addresses]
+
+    def probe(
+        service: _service.remote_service,
+        consumer_lags: list[float],
+    ) -> float | None:
+        topics = _service_topics(service)
+        backlog = 0
+        for url in urls:
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    stats = json.load(response)
+            except Exception as e:
+                _session.logger.warning(f"during fetch nsqd stats {url}: {e!r}")
+                return None
+
+            # nsqd before 1.0 wraps the response
+            stats = stats.get("data", stats)
+            for topic in stats.get("topics") or []:
+                channels = topics.get(topic["topic_name"])
+                if channels is None:
+                    continue
+                # messages are copied to channels, the topic depth is non zero only before any channel exists
+                backlog += topic.get("depth", 0)
+                for channel in topic.get("channels") or []:
+                    if channel["channel_name"] in channels:
+                        backlog += channel.get("depth", 0)
+        return backlog
+
+    return probe
+
+
+def consumer_lag_probe(
+    service: _service.remote_service,
+    consumer_lags: list[float],
+) -> float | None:
+    """
+    Returns the highest consumer lag in seconds reported by workers of the service.
+    """
+    if len(consumer_lags) == 0:
+        return None
+    return max(consumer_lags)
+
+
+def _report_consumer_lag(
+    session: _session.Almanet,
+    service: _service.remote_service,
+    consumer_lag,
+    interval: float,
+) -> None:
+    """
+    Periodically writes the highest lag of the service procedures to the shared value of the worker.
+    Invocations waiting for a free slot or still executing count with their age.
+    """
+    uris = {p._via or p.uri for p in service.procedures}
+
+    async def report() -> None:
+        while session.joined:
+            consumer_lag.value = max((session._metrics.take_consumer_lag(i) for i in uris), default=0)
+            await asyncio.sleep(interval)
+
+    session._background_tasks.schedule(report(), daemon=True)
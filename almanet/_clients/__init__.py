@@ -1,5 +1,7 @@
 from ._ansqd_tcp import *
+from ._local import *
 
 __all__ = [
     *_ansqd_tcp.__all__,
+    *_local.__all__,
 ]
@@ -1,24 +1,167 @@
+import asyncio
 import typing
 
 import ansq
+from ansq.tcp.consts import DEFAULT_REQ_TIMEOUT
 
 from almanet import _session
 from almanet import _shared
 
 if typing.TYPE_CHECKING:
+    from ansq.tcp.connection import NSQConnection
     from ansq.tcp.types import NSQMessage
 
 __all__ = [
+    "ack_batcher",
     "ansqd_tcp_client",
     "make_ansqd_tcp_session",
 ]
 
 
+class _ack_batch:
+    __slots__ = ("frames", "done", "timer")
+
+    def __init__(self) -> None:
+        self.frames: list[bytes] = []
+        self.done = asyncio.get_running_loop().create_future()
+        # the exception is delivered to every waiter, do not warn if all of them were cancelled
+        self.done.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class ack_batcher:
+    """
+    Groups acknowledgements (NSQ `FIN` and `REQ`) of messages received by the same connection within a short window
+    and writes them to the connection at once.
+    An acknowledgement completes when it is written, a message is redelivered if the process dies before that.
+
+    Args:
+    - window: seconds to wait for more acknowledgements after the first one of a batch.
+    - max_batch_size: writes a batch immediately when it reaches this size.
+    """
+
+    def __init__(
+        self,
+        window: float = 0.001,
+        max_batch_size: int = 128,
+    ) -> None:
+        if window < 0:
+            raise ValueError("window must be non-negative")
+
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._batches: dict["NSQConnection", _ack_batch] = {}
+
+    async def fin(
+        self,
+        message: "NSQMessage",
+    ) -> None:
+        if not message._connection.is_connected:
+            # the connection reconnects or closes, ansq handles it
+            await message.fin()
+            return
+
+        await self._acknowledge(message, b"FIN %s\n" % message.id.encode())
+
+    async def req(
+        self,
+        message: "NSQMessage",
+        timeout: int = DEFAULT_REQ_TIMEOUT,
+    ) -> None:
+        """
+        Args:
+        - timeout: milliseconds to defer the redelivery.
+        """
+        if not message._connection.is_connected:
+            await message.req(timeout)
+            return
+
+        await self._acknowledge(message, b"REQ %s %d\n" % (message.id.encode(), timeout))
+
+    async def _acknowledge(
+        self,
+        message: "NSQMessage",
+        frame: bytes,
+    ) -> None:
+        if not message.can_be_processed:
+            raise RuntimeWarning(f"message {message.id} was processed or timed out")
+
+        connection = message._connection
+
+        # a message is acknowledged once, even if the batch is not written yet
+        message._is_processed = True
+
+        batch = self._batches.get(connection)
+        if batch is None:
+            batch = _ack_batch()
+            self._batches[connection] = batch
+            loop = asyncio.get_running_loop()
+            batch.timer = loop.call_later(self.window, self._flush, connection)
+
+        batch.frames.append(frame)
+        if len(batch.frames) >= self.max_batch_size:
+            self._flush(connection)
+
+        # other waiters of the batch must not be affected by cancellation
+        await asyncio.shield(batch.done)
+
+    def _flush(
+        self,
+        connection: "NSQConnection",
+    ) -> None:
+        batch = self._batches.pop(connection, None)
+        if batch is None:
+            return
+
+        if batch.timer is not None:
+            batch.timer.cancel()
+
+        try:
+            if not connection.is_connected:
+                raise ConnectionError("connection closed before acknowledgements were written")
+
+            # ansq writes every command separately, one write sends the whole batch
+            assert connection._writer is not None
+            connection._writer.write(b"".join(batch.frames))
+            # keeps the counter of ansq in sync as its `execute` does for FIN and REQ,
+            # RDY needs no update: it is sent once on subscribe and nsqd frees the slots itself
+            connection._in_flight = max(0, connection._in_flight - len(batch.frames))
+            batch.done.set_result(None)
+        except Exception as e:
+            batch.done.set_exception(e)
+
+    def flush(self) -> None:
+        """
+        Writes all pending batches.
+        """
+        for connection in list(self._batches):
+            self._flush(connection)
+
+
 class ansqd_tcp_client:
+    """
+    Client of nsqd TCP protocol.
+
+    Args:
+    - addresses: nsqd TCP addresses.
+    - batch_window: if specified, messages produced to the same topic within the window (seconds)
+      are published together with `MPUB`.
+    - max_batch_size: maximum number of messages in one `MPUB`.
+    - ack_window: if specified, acknowledgements of messages received by the same connection within the window (seconds)
+      are written together.
+    - max_ack_batch_size: maximum number of acknowledgements in one write.
+    """
 
     def __init__(
         self,
         *addresses: str,
+        batch_window: float | None = None,
+        max_batch_size: int = 128,
+        ack_window: float | None = None,
+        max_ack_batch_size: int = 128,
     ):
         if len(addresses) == 0:
             raise ValueError("at least one address must be specified")
@@ -27,16 +170,38 @@ class ansqd_tcp_client:
             raise ValueError("addresses must be a iterable of strings")
 
         self.addresses = addresses
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.ack_window = ack_window
+        self.max_ack_batch_size = max_ack_batch_size
+        self._coalescing_writer: _shared.coalescing_writer | None = None
+        self._ack_batcher = None if ack_window is None else ack_batcher(ack_window, max_ack_batch_size)
 
     def clone(self) -> "ansqd_tcp_client":
-        return ansqd_tcp_client(*self.addresses)
+        return ansqd_tcp_client(
+            *self.addresses,
+            batch_window=self.batch_window,
+            max_batch_size=self.max_batch_size,
+            ack_window=self.ack_window,
+            max_ack_batch_size=self.max_ack_batch_size,
+        )
 
     async def connect(self) -> None:
         self.writer = await ansq.create_writer(
             nsqd_tcp_addresses=self.addresses,
         )
+        if self.batch_window is not None:
+            self._coalescing_writer = _shared.coalescing_writer(
+                self.produce_many,
+                window=self.batch_window,
+                max_batch_size=self.max_batch_size,
+            )
 
     async def close(self) -> None:
+        if self._ack_batcher is not None:
+            self._ack_batcher.flush()
+        if self._coalescing_writer is not None:
+            await self._coalescing_writer.close()
         await self.writer.close()
 
     async def produce(
@@ -47,38 +212,72 @@ class ansqd_tcp_client:
     ) -> None:
         if delay > 0:
             await self.writer.dpub(topic, message, delay)
+        elif self._coalescing_writer is not None:
+            await self._coalescing_writer.write(topic, message)  # type: ignore
         else:
             await self.writer.pub(topic, message)
 
-    async def _convert_ansq_message(
+    async def produce_many(
         self,
-        ansq_messages_stream: typing.AsyncIterable["NSQMessage"],
-    ) -> typing.AsyncIterable[_session.qmessage_model[bytes]]:
-        async for ansq_message in ansq_messages_stream:
-            almanet_message = _session.qmessage_model(
-                id=ansq_message.id,
-                timestamp=ansq_message.timestamp,
-                body=ansq_message.body,
-                attempts=ansq_message.attempts,
-                commit=ansq_message.fin,
-                rollback=ansq_message.req,
-            )
-            yield almanet_message
+        topic: str,
+        messages: typing.Sequence[str | bytes],
+    ) -> None:
+        if len(messages) == 1:
+            await self.writer.pub(topic, messages[0])
+        elif len(messages) > 1:
+            await self.writer.mpub(topic, *messages)
+
+    def _convert_ansq_message(
+        self,
+        ansq_message: "NSQMessage",
+    ) -> _session.qmessage_model[bytes]:
+        if self._ack_batcher is None:
+            commit = ansq_message.fin
+            rollback = ansq_message.req
+        else:
+            batcher = self._ack_batcher
+            commit = lambda: batcher.fin(ansq_message)
+            rollback = lambda: batcher.req(ansq_message)
+
+        return _session.qmessage_model(
+            id=ansq_message.id,
+            timestamp=ansq_message.timestamp,
+            body=ansq_message.body,
+            attempts=ansq_message.attempts,
+            commit=commit,
+            rollback=rollback,
+        )
 
     async def consume(
         self,
         topic: str,
         channel: str,
+        *,
+        max_in_flight: int | None = None,
     ) -> _session.returns_consumer:
         reader = await ansq.create_reader(
             nsqd_tcp_addresses=self.addresses, topic=topic, channel=channel, connection_options=ansq.ConnectionOptions()
         )
-        messages_stream = reader.messages()
-        messages_stream = self._convert_ansq_message(messages_stream)
+        if max_in_flight is not None:
+            # ansq subscribes every connection with RDY=1, nsqd expects RDY to be spread across connections
+            connections = reader.connections
+            rdy = max(1, max_in_flight // max(1, len(connections)))
+            for connection in connections:
+                await connection.rdy(rdy)
+
+        async def close_reader() -> None:
+            # acknowledgements must be written before the connections close, or nsqd redelivers the messages
+            if self._ack_batcher is not None:
+                self._ack_batcher.flush()
+            await reader.close()
+
         # ansq does not close stream automatically
-        return _shared.make_closable(messages_stream, reader.close)
+        return _shared.make_closable(reader.messages(), close_reader, self._convert_ansq_message)
 
 
-def make_ansqd_tcp_session(*addresses: str) -> _session.Almanet:
-    client = ansqd_tcp_client(*addresses)
+def make_ansqd_tcp_session(
+    *addresses: str,
+    **kwargs,
+) -> _session.Almanet:
+    client = ansqd_tcp_client(*addresses, **kwargs)
     return _session.Almanet(client)
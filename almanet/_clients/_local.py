@@ -0,0 +1,388 @@
+import asyncio
+import collections
+import random
+import time
+import typing
+
+from almanet import _session
+from almanet import _shared
+
+__all__ = [
+    "local_broker",
+    "local_client",
+    "make_local_session",
+]
+
+
+@_shared.dataclass(slots=True)
+class _local_message:
+    id: str
+    timestamp: int
+    body: bytes
+    attempts: int = 0
+    consumer: "_local_consumer | None" = None
+
+
+class _local_consumer:
+
+    def __init__(
+        self,
+        channel: "_local_channel",
+        max_in_flight: int,
+    ) -> None:
+        self.channel = channel
+        self.max_in_flight = max_in_flight
+        self.in_flight: dict[str, _local_message] = {}
+        self.queue = asyncio.Queue[_local_message | None]()
+        self.closed = False
+
+    @property
+    def ready(self) -> bool:
+        return not self.closed and len(self.in_flight) < self.max_in_flight
+
+    def deliver(
+        self,
+        message: _local_message,
+    ) -> None:
+        message.attempts += 1
+        message.consumer = self
+        self.in_flight[message.id] = message
+        self.queue.put_nowait(message)
+
+    def finish(
+        self,
+        message: _local_message,
+    ) -> bool:
+        if message.consumer is not self or self.in_flight.pop(message.id, None) is None:
+            return False
+        message.consumer = None
+        return True
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        # nsqd requeues in flight messages of a disconnected consumer
+        for message in list(self.in_flight.values()):
+            self.finish(message)
+            self.channel.put(message)
+        self.channel.remove_consumer(self)
+        self.queue.put_nowait(None)
+
+    def _to_qmessage(
+        self,
+        message: _local_message,
+    ) -> _session.qmessage_model[bytes]:
+        async def commit() -> None:
+            if self.finish(message):
+                self.channel.dispatch()
+
+        async def rollback(delay: int = 0) -> None:
+            if self.finish(message):
+                self.channel.put(message, delay=delay)
+
+        return _session.qmessage_model(
+            id=message.id,
+            timestamp=message.timestamp,
+            body=message.body,
+            attempts=message.attempts,
+            commit=commit,
+            rollback=rollback,
+        )
+
+    async def messages(self) -> typing.AsyncIterable[_session.qmessage_model[bytes]]:
+        while True:
+            message = await self.queue.get()
+            if message is None:
+                break
+            yield self._to_qmessage(message)
+
+
+class _local_channel:
+
+    def __init__(
+        self,
+        topic: "_local_topic",
+        name: str,
+    ) -> None:
+        self.topic = topic
+        self.name = name
+        self.ephemeral = name.endswith("#ephemeral")
+        self.pending = collections.deque[_local_message]()
+        self.consumers: list[_local_consumer] = []
+        self._next_consumer = 0
+
+    def put(
+        self,
+        message: _local_message,
+        delay: int = 0,
+    ) -> None:
+        if delay > 0:
+            loop = asyncio.get_running_loop()
+            loop.call_later(delay / 1000, self.put, message)
+            return
+        self.pending.append(message)
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        """
+        Delivers pending messages to ready consumers in round-robin order.
+        """
+        while len(self.pending) > 0:
+            consumer = self._choose_consumer()
+            if consumer is None:
+                return
+            consumer.deliver(self.pending.popleft())
+
+    def _choose_consumer(self) -> _local_consumer | None:
+        n = len(self.consumers)
+        for i in range(n):
+            consumer = self.consumers[(self._next_consumer + i) % n]
+            if consumer.ready:
+                self._next_consumer = (self._next_consumer + i + 1) % n
+                return consumer
+        return None
+
+    def add_consumer(
+        self,
+        max_in_flight: int,
+    ) -> _local_consumer:
+        consumer = _local_consumer(self, max_in_flight)
+        self.consumers.append(consumer)
+        return consumer
+
+    def remove_consumer(
+        self,
+        consumer: _local_consumer,
+    ) -> None:
+        self.consumers.remove(consumer)
+        if len(self.consumers) == 0 and self.ephemeral:
+            self.topic.remove_channel(self)
+        else:
+            self.dispatch()
+
+
+class _local_topic:
+
+    def __init__(
+        self,
+        broker: "local_broker",
+        name: str,
+    ) -> None:
+        self.broker = broker
+        self.name = name
+        self.ephemeral = name.endswith("#ephemeral")
+        # nsqd buffers messages of a topic until the first channel is created
+        self.backlog = collections.deque[_local_message]()
+        self.channels: dict[str, _local_channel] = {}
+
+    def publish(
+        self,
+        body: bytes,
+    ) -> None:
+        if len(self.channels) == 0:
+            self.backlog.append(_local_message(_shared.new_id(), time.time_ns(), body))
+            return
+
+        message_id = _shared.new_id()
+        timestamp = time.time_ns()
+        for channel in self.channels.values():
+            channel.put(_local_message(message_id, timestamp, body))
+
+    def get_channel(
+        self,
+        name: str,
+    ) -> _local_channel:
+        channel = self.channels.get(name)
+        if channel is None:
+            channel = _local_channel(self, name)
+            self.channels[name] = channel
+            while len(self.backlog) > 0:
+                channel.pending.append(self.backlog.popleft())
+        return channel
+
+    def remove_channel(
+        self,
+        channel: _local_channel,
+    ) -> None:
+        self.channels.pop(channel.name, None)
+        if len(self.channels) == 0 and self.ephemeral:
+            self.broker.topics.pop(self.name, None)
+
+
+class local_broker:
+    """
+    In-process message broker that follows nsqd topic and channel semantics:
+    - every channel of a topic receives a copy of each message
+    - consumers of the same channel share its messages
+    - uncommitted messages are redelivered on rollback or consumer close
+    - ephemeral topics and channels disappear with their last consumer
+    """
+
+    def __init__(self) -> None:
+        self.topics: dict[str, _local_topic] = {}
+
+    def get_topic(
+        self,
+        name: str,
+    ) -> _local_topic:
+        topic = self.topics.get(name)
+        if topic is None:
+            topic = _local_topic(self, name)
+            self.topics[name] = topic
+        return topic
+
+    def publish(
+        self,
+        topic: str,
+        body: bytes,
+        delay: int = 0,
+    ) -> None:
+        """
+        Publishes a message to the topic.
+
+        Args:
+        - delay: in milliseconds, like nsqd `DPUB`.
+        """
+        if delay > 0:
+            loop = asyncio.get_running_loop()
+            loop.call_later(delay / 1000, self.publish, topic, body)
+            return
+        self.get_topic(topic).publish(body)
+
+    @property
+    def consumers_count(self) -> int:
+        return sum(len(c.consumers) for t in self.topics.values() for c in t.channels.values())
+
+
+class local_client:
+    """
+    Client of the in-process `local_broker`.
+    Useful to test and to benchmark almanet without nsqd.
+
+    Args:
+    - broker: shared broker, a new one is created by default.
+    - latency: seconds every produce request takes, requests of a client are served one at a time
+      like commands of one nsqd connection.
+    - loss: probability to silently drop a produced message.
+    - seed: seed of random generator used by `loss`.
+    - batch_window: if specified, messages produced to the same topic within the window (seconds)
+      are published together, like `ansqd_tcp_client`.
+    - max_batch_size: maximum number of messages in one batch.
+    """
+
+    def __init__(
+        self,
+        broker: local_broker | None = None,
+        *,
+        latency: float = 0,
+        loss: float = 0,
+        seed: int | None = None,
+        batch_window: float | None = None,
+        max_batch_size: int = 128,
+    ) -> None:
+        if latency < 0:
+            raise ValueError("latency must be non-negative")
+
+        if not 0 <= loss <= 1:
+            raise ValueError("loss must be between 0 and 1")
+
+        self.broker = broker or local_broker()
+        self.latency = latency
+        self.loss = loss
+        self.seed = seed
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._random = random.Random(seed)
+        self._connection_lock = asyncio.Lock()
+        self._coalescing_writer: _shared.coalescing_writer | None = None
+
+    def clone(self) -> "local_client":
+        """
+        Returns a client of the same broker.
+        Note that the broker can not be shared between processes.
+        """
+        return local_client(
+            self.broker,
+            latency=self.latency,
+            loss=self.loss,
+            seed=self.seed,
+            batch_window=self.batch_window,
+            max_batch_size=self.max_batch_size,
+        )
+
+    async def _round_trip(self) -> None:
+        if self.latency > 0:
+            async with self._connection_lock:
+                await asyncio.sleep(self.latency)
+
+    async def connect(self) -> None:
+        if self.batch_window is not None:
+            self._coalescing_writer = _shared.coalescing_writer(
+                self.produce_many,
+                window=self.batch_window,
+                max_batch_size=self.max_batch_size,
+            )
+
+    async def close(self) -> None:
+        if self._coalescing_writer is not None:
+            await self._coalescing_writer.close()
+
+    async def produce(
+        self,
+        topic: str,
+        message: str | bytes,
+        delay: int,
+    ) -> None:
+        if isinstance(message, str):
+            message = message.encode()
+
+        if delay == 0 and self._coalescing_writer is not None:
+            await self._coalescing_writer.write(topic, message)
+            return
+
+        await self._round_trip()
+
+        if self.loss > 0 and self._random.random() < self.loss:
+            return
+
+        self.broker.publish(topic, message, delay=delay)
+
+    async def produce_many(
+        self,
+        topic: str,
+        messages: typing.Sequence[str | bytes],
+    ) -> None:
+        """
+        Publishes messages in one round trip.
+        """
+        await self._round_trip()
+
+        for message in messages:
+            if self.loss > 0 and self._random.random() < self.loss:
+                continue
+
+            if isinstance(message, str):
+                message = message.encode()
+
+            self.broker.publish(topic, message)
+
+    async def consume(
+        self,
+        topic: str,
+        channel: str,
+        *,
+        max_in_flight: int | None = None,
+    ) -> _session.returns_consumer:
+        # like `ansq`, every consumer has RDY=1 by default
+        consumer = self.broker.get_topic(topic).get_channel(channel).add_consumer(max_in_flight=max_in_flight or 1)
+        consumer.channel.dispatch()
+        return consumer.messages(), consumer.close
+
+
+def make_local_session(
+    broker: local_broker | None = None,
+    **kwargs,
+) -> _session.Almanet:
+    client = local_client(broker, **kwargs)
+    return _session.Almanet(client)
@@ -1,10 +1,17 @@
 import asyncio
+import functools
 import multiprocessing
+import multiprocessing.connection
+import multiprocessing.process
 import signal
+import time
+import typing
 
 from . import (
+    _autoscaling,
     _service,
     _session,
+    _shared,
 )
 
 __all__ = [
@@ -28,8 +35,16 @@ def serve_single(
         await session.join()
         await service._post_join_event.notify(session)
 
+    leaving = False
+
     async def end() -> None:
-        await session.leave()
+        # SIGINT from a terminal reaches workers together with SIGTERM from the supervisor
+        nonlocal leaving
+        if leaving:
+            return
+        leaving = True
+        if session.joined:
+            await session.leave()
         if stop_loop_on_exit:
             loop.stop()
 
@@ -46,47 +61,212 @@ def serve_single(
 def _initialize_new_process(
     client,
     service_uri: str,
+    consumer_lag=None,
+    consumer_lag_interval: float = 1,
     **kwargs,
 ) -> None:
+    # forked workers inherit signal handlers of the supervisor
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
     service = _service.get_service(service_uri)
     if service is None:
         raise ValueError(f"invalid service type {service_uri=}")
 
+    if consumer_lag is not None:
+        service.post_join(
+            functools.partial(
+                _autoscaling._report_consumer_lag,
+                service=service,
+                consumer_lag=consumer_lag,
+                interval=consumer_lag_interval,
+            )
+        )
+
     serve_single(client, service, **kwargs)
 
 
+@_shared.dataclass(slots=True)
+class _worker_slot:
+    service: _service.remote_service
+    client: _session.client_iface
+    process: multiprocessing.process.BaseProcess | None = None
+    started_at: float = 0
+    # consecutive crashes, reset when the worker survives longer than the maximum backoff
+    failures: int = 0
+    restart_at: float | None = None
+    # removed by autoscaling, the slot is dropped once the worker exits
+    retiring: bool = False
+    # latest consumer lag reported by the worker, shared memory value
+    consumer_lag: typing.Any = None
+
+
 def serve_multiple(
     sample_client: _session.client_iface,
     *services: _service.remote_service,
+    start_method: typing.Literal["fork", "forkserver", "spawn"] | None = None,
+    restart: bool = True,
+    restart_backoff: float = 0.5,
+    max_restart_backoff: float = 30,
+    shutdown_timeout: float = 60,
+    autoscaling: _autoscaling.autoscaling_model | None = None,
     **kwargs,
 ) -> None:
+    """
+    Serves each service in `service.workers` processes and supervises them.
+    SIGINT or SIGTERM make every worker leave its session, waiting for in-flight invocations.
+
+    Args:
+    - start_method: multiprocessing start method, "fork" shares memory of imported modules copy-on-write.
+    - restart: restarts crashed workers.
+    - restart_backoff: seconds before the first restart, doubles for each consecutive crash.
+    - max_restart_backoff: maximum seconds before a restart.
+    - shutdown_timeout: seconds to wait for workers to leave before killing them.
+    - autoscaling: scales workers of each service up to `service.max_workers` following its backlog.
+    """
     if len(services) == 0:
         raise ValueError("must provide at least one service")
 
     if not all(isinstance(s, _service.remote_service) for s in services):
         raise TypeError("all services must be of type remote_service")
 
-    processes: list[multiprocessing.Process] = []
-    for s in services:
-        client4process = sample_client.clone()
-        process = multiprocessing.Process(
+    context = multiprocessing.get_context(start_method)
+
+    def new_slot(service: _service.remote_service) -> _worker_slot:
+        slot = _worker_slot(service, sample_client.clone())
+        if autoscaling is not None:
+            slot.consumer_lag = context.Value("d", 0.0, lock=False)
+        return slot
+
+    slots = [new_slot(s) for s in services for _ in range(s.workers)]
+
+    def start(slot: _worker_slot) -> None:
+        process_kwargs = kwargs
+        if autoscaling is not None:
+            process_kwargs = {
+                **kwargs,
+                "consumer_lag": slot.consumer_lag,
+                "consumer_lag_interval": autoscaling.interval,
+            }
+        process = context.Process(
             target=_initialize_new_process,
-            args=(client4process, s.pre),
-            kwargs=kwargs,
+            args=(slot.client, slot.service.pre),
+            kwargs=process_kwargs,
         )
         process.start()
-        processes.append(process)
+        slot.process = process
+        slot.started_at = time.monotonic()
+        slot.restart_at = None
 
-    has_active_process = True
-    while has_active_process:
-        has_active_process = False
+    last_scaled_at = {s.pre: time.monotonic() for s in services}
 
-        for process in processes:
-            if not process.is_alive():
+    def scale(now: float) -> None:
+        assert autoscaling is not None
+        for service in services:
+            active_slots = [i for i in slots if i.service is service and not i.retiring]
+            try:
+                backlog = autoscaling.probe(service, [i.consumer_lag.value for i in active_slots])
+            except Exception:
+                _session.logger.exception(f"during probe {service.pre} backlog")
                 continue
 
-            try:
-                process.join()
-            except KeyboardInterrupt:
-                # termination signal to child processes already sent
-                has_active_process = True
+            if backlog is None:
+                continue
+
+            if backlog > autoscaling.scale_up_threshold and len(active_slots) < service.max_workers:
+                _session.logger.info(f"scaling {service.pre} up to {len(active_slots) + 1} workers, {backlog=}")
+                slot = new_slot(service)
+                slots.append(slot)
+                start(slot)
+                last_scaled_at[service.pre] = now
+            elif (
+                backlog <= autoscaling.scale_down_threshold
+                and len(active_slots) > service.workers
+                and now - last_scaled_at[service.pre] >= autoscaling.cooldown
+            ):
+                _session.logger.info(f"scaling {service.pre} down to {len(active_slots) - 1} workers, {backlog=}")
+                slot = active_slots[-1]
+                slot.retiring = True
+                if slot.restart_at is not None:
+                    slots.remove(slot)
+                elif slot.process is not None and slot.process.is_alive():
+                    slot.process.terminate()
+                last_scaled_at[service.pre] = now
+
+    stopping = False
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for slot in slots:
+            if slot.process is not None and slot.process.is_alive():
+                slot.process.terminate()
+
+    previous_handlers = {s: signal.signal(s, stop) for s in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for slot in slots:
+            start(slot)
+
+        next_scale_at = time.monotonic() + autoscaling.interval if autoscaling is not None else None
+        while not stopping:
+            now = time.monotonic()
+            for slot in list(slots):
+                if slot.restart_at is not None:
+                    if now >= slot.restart_at:
+                        _session.logger.warning(f"restarting {slot.service.pre} worker")
+                        start(slot)
+                    continue
+
+                if slot.process is None or slot.process.exitcode is None:
+                    continue
+
+                if slot.retiring:
+                    slots.remove(slot)
+                    continue
+
+                if slot.process.exitcode == 0 or not restart:
+                    # the worker left its session
+                    slot.process = None
+                    continue
+
+                if now - slot.started_at > max_restart_backoff:
+                    slot.failures = 0
+                backoff = min(max_restart_backoff, restart_backoff * 2**slot.failures)
+                slot.failures += 1
+                slot.restart_at = now + backoff
+                _session.logger.error(
+                    f"{slot.service.pre} worker {slot.process.pid} exited with code {slot.process.exitcode}, "
+                    f"restarting in {backoff}s"
+                )
+
+            if next_scale_at is not None and now >= next_scale_at:
+                scale(now)
+                next_scale_at = now + autoscaling.interval  # type: ignore
+
+            # includes workers exited after the check above, their sentinels are ready and the next iteration handles them
+            alive = [i.process for i in slots if i.process is not None and i.restart_at is None]
+            scheduled = [i.restart_at for i in slots if i.restart_at is not None]
+            if len(alive) == 0 and len(scheduled) == 0:
+                break
+
+            if next_scale_at is not None:
+                scheduled.append(next_scale_at)
+            timeout = max(0, min(scheduled) - time.monotonic()) if scheduled else None
+            ready = multiprocessing.connection.wait([p.sentinel for p in alive], timeout=timeout)
+            for p in alive:
+                if p.sentinel in ready:
+                    # the sentinel is ready before the exit code is collected
+                    p.join()
+
+        deadline = time.monotonic() + shutdown_timeout
+        for slot in slots:
+            if slot.process is None:
+                continue
+            slot.process.join(max(0, deadline - time.monotonic()))
+            if slot.process.is_alive():
+                _session.logger.error(f"{slot.service.pre} worker {slot.process.pid} did not leave, killing")
+                slot.process.kill()
+                slot.process.join()
+    finally:
+        for s, handler in previous_handlers.items():
+            signal.signal(s, handler)
@@ -1,4 +1,16 @@
+import asyncio
+import collections.abc
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import importlib
+import inspect
+import itertools
+import logging
+import time
 import typing
+import weakref
 
 import pydantic_core
 
@@ -12,6 +24,7 @@ __all__ = [
     "remote_procedure_model",
     "remote_service",
     "new_remote_service",
+    "invalidate_cache",
 ]
 
 
@@ -28,6 +41,7 @@ class remote_exception(_session.rpc_exception):
         klass,
         v: bytes,
         *args,
+        content_type: str = _shared.JSON_CONTENT_TYPE,
         **kwargs,
     ) -> "remote_exception":
         """
@@ -37,8 +51,8 @@ class remote_exception(_session.rpc_exception):
         - pydantic_code.ValidationError
         """
         model = klass.__annotations__.get("payload", ...)
-        serializer = _shared.serialize_json(model)
-        payload = serializer(v)
+        codec = _shared.get_wire_codec(content_type)
+        payload = codec.decode(v, model)
         return klass(payload)
 
 
@@ -62,6 +76,56 @@ class rpc_invalid_exception_payload(rpc_invalid_payload):
     """
 
 
+DEFAULT_OFFLOAD_THRESHOLD = 256 * 1024
+
+
+class _batch_function[I, O](typing.Protocol):
+    async def __call__(
+        self,
+        payloads: list[I],
+        *args,
+        **kwargs,
+    ) -> list[O | Exception]: ...
+
+
+def _estimated_size(
+    value,
+    limit: int,
+) -> int:
+    """
+    Returns a lower bound of the encoded size of the value, stops counting once it exceeds the limit.
+    Strings and bytes count by their length, any other value by at least a byte.
+    """
+    size = 1
+    pending = [value]
+    while len(pending) > 0 and size <= limit:
+        value = pending.pop()
+        if isinstance(value, (str, bytes, bytearray)):
+            size += len(value)
+            continue
+
+        if isinstance(value, collections.abc.Mapping):
+            items = itertools.chain.from_iterable(value.items())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            items = iter(value)
+        elif hasattr(value, "__dict__"):
+            items = iter(vars(value).values())
+        else:
+            continue
+
+        # no more items are visited than the limit allows
+        items = list(itertools.islice(items, limit - size + 1))
+        pending.extend(items)
+        size += len(items)
+    return size
+
+
+def _unwrap_list_annotation(annotation):
+    if typing.get_origin(annotation) in (list, collections.abc.Sequence):
+        return typing.get_args(annotation)[0]
+    return annotation
+
+
 @_shared.dataclass(kw_only=True, slots=True)
 class remote_procedure_model[I, O](_shared.procedure_model[I, O]):
     service: "remote_service"
@@ -69,20 +133,78 @@ class remote_procedure_model[I, O](_shared.procedure_model[I, O]):
     channel: str = _session.DEFAULT_CHANNEL
     exceptions: set[type[remote_exception]] = ...
     include_to_api: bool = False
+    max_in_flight: int | None = None
+    concurrency: int | None = None
+    content_type: str = _shared.JSON_CONTENT_TYPE
+    # where remote invocations are decoded, executed and encoded, see `_remote_execution_off_loop`
+    executor: _shared.executor_kind = "loop"
+    # bytes, larger payloads and replies are decoded and encoded in the thread pool, never if None
+    offload_threshold: int | None = DEFAULT_OFFLOAD_THRESHOLD
+    # results of remote calls by encoded payload, held by the caller process
+    cache: _shared.result_cache | None = None
+    # identical calls in flight share one invocation, see `Almanet.call`
+    coalesce: bool = False
+    # if specified, the function takes a list of payloads and returns a result or an exception for each,
+    # invocations are collected for up to `batch_window` seconds
+    batch_size: int | None = None
+    batch_window: float = 0.005
     _has_implementation: bool = False
 
     def __post_init__(self):
+        if self.batch_size is not None:
+            if self.executor != "loop":
+                raise ValueError("batch procedures run on the event loop")
+            # callers send and receive single items
+            payload_model, return_model = _shared.extract_annotations(
+                self.function,
+                self.payload_model,
+                self.return_model,
+            )
+            self.payload_model = _unwrap_list_annotation(payload_model)
+            self.return_model = _unwrap_list_annotation(return_model)
         super(remote_procedure_model, self).__post_init__()
         if self.uri is ...:
             self.uri = ".".join([self.service.pre, self.name])
+        # raises ValueError if content type is unknown
+        _shared.get_wire_codec(self.content_type)
+        if self.content_type == _shared.MSGPACK_CONTENT_TYPE:
+            _shared.msgpack_codec.require()
+        if isinstance(self.executor, str) and self.executor not in ("loop", "thread", "process"):
+            raise ValueError(f"unknown executor {self.executor!r}")
+        if self.executor == "process" and "<locals>" in getattr(self.function, "__qualname__", ""):
+            raise ValueError("procedures executed in process pool must be declared at module level")
+        if self.offload_threshold is not None and self.offload_threshold < 0:
+            raise ValueError("offload_threshold must be non-negative")
+        if self.cache is not None:
+            _result_caches[self.uri] = self.cache
+        if self._via is not None:
+            _session.multiplexed_uris[self.uri] = self._via
         self.exceptions.add(rpc_invalid_payload)
         self.exceptions.add(rpc_invalid_return)
 
+    @property
+    def _via(self) -> str | None:
+        """
+        Uri of the multiplexed consumer of the service, None if the procedure has its own.
+        Batch procedures and procedures on other channels keep their own consumers.
+        """
+        if self.service.multiplexed and self.channel == _session.DEFAULT_CHANNEL and self.batch_size is None:
+            return self.service.multiplexed_uri
+        return None
+
+    def __reduce__(self):
+        # sent to process pools by reference, the worker imports the module that declares the procedure
+        return _find_procedure, (self.function.__module__, self.service.pre, self.uri)
+
     def execute(
         self,
         payload: I,
         session: _session.Almanet,
     ) -> typing.Awaitable[O]:
+        if self.batch_size is not None:
+            return self._execute_single(payload, session)
+        if self.executor != "loop":
+            return self._run_in_executor(functools.partial(_run_procedure, self, payload), session)
         return self.function(payload, session=session)
 
     async def _remote_execution(
@@ -93,19 +215,158 @@ class remote_procedure_model[I, O](_shared.procedure_model[I, O]):
         """
         if called remotely
         """
-        _session.logger.debug(f"remote calling {self.uri}")
+        if _session.logger.isEnabledFor(logging.DEBUG):
+            _session.logger.debug(f"remote calling {self.uri}")
 
-        try:
-            __payload = self.serialize_payload(payload)
-        except pydantic_core.ValidationError as e:
-            raise rpc_invalid_payload(str(e))
+        invocation = _session.get_current_invocation()
+        codec = _shared.json_codec if invocation is None else _shared.get_wire_codec(invocation.content_type)
+
+        if self.executor != "loop":
+            return await self._remote_execution_off_loop(payload, session, codec)
+
+        if self._is_large(payload):
+            __payload = await self._offload_codec(session, "decode", self._decode_payload, payload, codec)
+        else:
+            __payload = self._decode_payload(payload, codec)
 
         result = await self.execute(__payload, session)
 
         # if not isinstance(result, self.return_model):
         #     raise rpc_invalid_return()
 
-        return _shared.dump(result)
+        if self._is_large_result(result):
+            return await self._offload_codec(session, "encode", codec.encode, result)
+        return codec.encode(result)
+
+    def _is_large(
+        self,
+        data: bytes,
+    ) -> bool:
+        return self.offload_threshold is not None and len(data) > self.offload_threshold
+
+    def _is_large_result(
+        self,
+        result,
+    ) -> bool:
+        # the size of a reply is known only after encoding, each result is estimated instead
+        if self.offload_threshold is None:
+            return False
+        return _estimated_size(result, self.offload_threshold) > self.offload_threshold
+
+    async def _offload_codec[T](
+        self,
+        session: _session.Almanet,
+        operation: str,
+        function: typing.Callable[..., T],
+        *args,
+    ) -> T:
+        """
+        Runs the codec function in the thread pool, the time it took is the event loop time saved.
+        """
+
+        def timed() -> tuple[T, float]:
+            begin_time = time.perf_counter()
+            result = function(*args)
+            return result, time.perf_counter() - begin_time
+
+        executor = _shared.get_executor("thread")
+        result, elapsed = await asyncio.get_running_loop().run_in_executor(executor, timed)
+        session._metrics.codec_offloaded.inc(uri=self.uri, operation=operation)
+        session._metrics.codec_offloaded_seconds.inc(elapsed, uri=self.uri, operation=operation)
+        return result
+
+    @property
+    def _batch_function(self) -> "_batch_function[I, O]":
+        return typing.cast(_batch_function[I, O], self.function)
+
+    async def _execute_single(
+        self,
+        payload: I,
+        session: _session.Almanet,
+    ) -> O:
+        results = await self._batch_function([payload], session=session)
+        if isinstance(results[0], Exception):
+            raise results[0]
+        return results[0]
+
+    async def _remote_execution_batch(
+        self,
+        invocations: list[_session.invoke_event_model],
+        session: _session.Almanet,
+    ) -> list[bytes | Exception]:
+        """
+        if called remotely in batch mode, each invocation is decoded and its result encoded in its own format
+        """
+        results: list[bytes | Exception] = [b""] * len(invocations)
+        decoded: list[tuple[int, I]] = []
+        for index, invocation in enumerate(invocations):
+            codec = _shared.get_wire_codec(invocation.content_type)
+            try:
+                decoded.append((index, self._decode_payload(invocation.payload, codec)))
+            except rpc_invalid_payload as e:
+                results[index] = e
+
+        if len(decoded) == 0:
+            return results
+
+        outputs = await self._batch_function([payload for _, payload in decoded], session=session)
+        if len(outputs) != len(decoded):
+            raise ValueError(f"{self.uri} returned {len(outputs)} results for {len(decoded)} payloads")
+
+        for (index, _), output in zip(decoded, outputs):
+            if isinstance(output, Exception):
+                results[index] = output
+            else:
+                results[index] = _shared.get_wire_codec(invocations[index].content_type).encode(output)
+        return results
+
+    def _decode_payload(
+        self,
+        payload: bytes,
+        codec: _shared.wire_codec,
+    ) -> I:
+        try:
+            if codec is _shared.json_codec:
+                # framed envelopes carry memoryview, pydantic parses contiguous bytes only
+                return self.serialize_payload(bytes(payload))
+            return codec.decode(payload, self.payload_model if self.validate else ...)
+        except pydantic_core.ValidationError as e:
+            raise rpc_invalid_payload(str(e))
+
+    async def _run_in_executor(
+        self,
+        function: typing.Callable[..., typing.Any],
+        session: _session.Almanet,
+    ) -> typing.Any:
+        """
+        Procedures in a thread pool receive the session, but must not use it, it belongs to the loop thread.
+        Procedures in other executors receive None.
+        """
+        executor = _shared.get_executor(self.executor)
+        loop = asyncio.get_running_loop()
+        if isinstance(executor, concurrent.futures.ThreadPoolExecutor):
+            # the procedure can still read the current invocation
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(executor, functools.partial(context.run, function, session))
+        return await loop.run_in_executor(executor, function, None)
+
+    async def _remote_execution_off_loop(
+        self,
+        payload: bytes,
+        session: _session.Almanet,
+        codec: _shared.wire_codec,
+    ) -> bytes:
+        """
+        Decodes, executes and encodes in the executor, the event loop only waits for the result.
+        """
+        is_exception, result = await self._run_in_executor(
+            functools.partial(_execute_off_loop, self, bytes(payload), codec.content_type),
+            session,
+        )
+        if is_exception:
+            name, exception_payload = result
+            raise _session.rpc_exception(exception_payload, name=name)
+        return result
 
     class _local_execution_kwargs(_session.Almanet._call_kwargs):
         force_local: typing.NotRequired[bool]
@@ -121,7 +382,8 @@ class remote_procedure_model[I, O](_shared.procedure_model[I, O]):
         Args:
         - force_local: if True, force local execution
         """
-        _session.logger.debug(f"local calling {self.uri}")
+        if _session.logger.isEnabledFor(logging.DEBUG):
+            _session.logger.debug(f"local calling {self.uri}")
 
         session = _session.get_active_session()
 
@@ -129,18 +391,115 @@ class remote_procedure_model[I, O](_shared.procedure_model[I, O]):
         if self._has_implementation and force_local:
             return await self.execute(payload, session)
 
+        kwargs.setdefault("content_type", self.content_type)
+
         try:
-            reply_event = await session.call(self.uri, payload, **kwargs)
-            return self.serialize_return(reply_event.payload)
+            reply_event = await self._call_remote(session, payload, **kwargs)
+            if self._is_large(reply_event.payload):
+                return await self._offload_codec(session, "decode", self._decode_return, reply_event)
+            return self._decode_return(reply_event)
         except _session.rpc_exception as e:
-            for etype in self.exceptions:
-                if e.name == etype.__name__:
-                    try:
-                        raise etype._make_from_payload(e.payload)
-                    except pydantic_core.ValidationError as e:
-                        raise rpc_invalid_exception_payload(str(e))
-            _session.logger.warning(f"{e.name} exception not define for {self.uri}")
-            raise e
+            raise self._convert_exception(e)
+
+    def _convert_exception(
+        self,
+        e: _session.rpc_exception,
+    ) -> Exception:
+        for etype in self.exceptions:
+            if e.name == etype.__name__:
+                try:
+                    return etype._make_from_payload(e.payload, content_type=e.content_type)
+                except pydantic_core.ValidationError as validation_error:
+                    return rpc_invalid_exception_payload(str(validation_error))
+        _session.logger.warning(f"{e.name} exception not define for {self.uri}")
+        return e
+
+    def _convert_result(
+        self,
+        result: _session.reply_event_model | Exception,
+    ) -> O | Exception:
+        if isinstance(result, _session.rpc_exception):
+            return self._convert_exception(result)
+        if isinstance(result, Exception):
+            return result
+        try:
+            return self._decode_return(result)
+        except Exception as e:
+            return e
+
+    async def iter_call_many(
+        self,
+        payloads: typing.Iterable[I],
+        **kwargs: typing.Unpack[_session.Almanet._call_many_kwargs],
+    ) -> typing.AsyncIterator[tuple[int, O | Exception]]:
+        """
+        Executes the remote procedure once for each payload, see `Almanet.iter_call_many`.
+        Yields the index of the payload and its decoded result or exception, in completion order.
+        """
+        session = _session.get_active_session()
+        kwargs.setdefault("content_type", self.content_type)
+        kwargs.setdefault("via", self._via)
+        async with contextlib.aclosing(session.iter_call_many(self.uri, payloads, **kwargs)) as results:  # type: ignore
+            async for index, result in results:
+                yield index, self._convert_result(result)
+
+    async def call_many(
+        self,
+        payloads: typing.Iterable[I],
+        **kwargs: typing.Unpack[_session.Almanet._call_many_kwargs],
+    ) -> list[O | Exception]:
+        """
+        Executes the remote procedure once for each payload, see `Almanet.call_many`.
+        Returns decoded results in the order of payloads, failed invocations are represented by their exceptions.
+        """
+        session = _session.get_active_session()
+        kwargs.setdefault("content_type", self.content_type)
+        kwargs.setdefault("via", self._via)
+        results = await session.call_many(self.uri, payloads, **kwargs)
+        return [self._convert_result(i) for i in results]
+
+    async def _call_remote(
+        self,
+        session: _session.Almanet,
+        payload: I,
+        **kwargs: typing.Unpack[_session.Almanet._call_kwargs],
+    ) -> _session.reply_event_model:
+        if self.cache is None:
+            return await session.call(self.uri, payload, coalesce=self.coalesce, via=self._via, **kwargs)
+
+        _subscribe_cache_invalidation(session)
+
+        # the call reuses the encoded payload instead of encoding it again
+        key = _shared.get_wire_codec(kwargs.get("content_type", self.content_type)).encode(payload)
+        found, reply_event = self.cache.get(key)
+        if found:
+            session._metrics.result_cache_hits.inc(uri=self.uri)
+            return reply_event
+
+        session._metrics.result_cache_misses.inc(uri=self.uri)
+        generation = self.cache.generation
+        reply_event = await session.call(self.uri, key, coalesce=self.coalesce, via=self._via, **kwargs)
+        # framed replies are views of the received message
+        reply_event.payload = bytes(reply_event.payload)
+        evicted = self.cache.set(key, reply_event, generation)
+        if evicted > 0:
+            session._metrics.result_cache_evictions.inc(evicted, uri=self.uri)
+        return reply_event
+
+    def invalidate_cache(self) -> asyncio.Task[None]:
+        """
+        Clears cached results of the procedure in every process.
+        """
+        return invalidate_cache(self.uri)
+
+    def _decode_return(
+        self,
+        reply_event: _session.reply_event_model,
+    ) -> O:
+        if reply_event.content_type == _shared.JSON_CONTENT_TYPE:
+            return self.serialize_return(bytes(reply_event.payload))
+        codec = _shared.get_wire_codec(reply_event.content_type)
+        return codec.decode(reply_event.payload, self.return_model if self.validate else ...)
 
     def __call__(
         self,
@@ -168,6 +527,15 @@ class remote_procedure_model[I, O](_shared.procedure_model[I, O]):
             uri=self.uri,
             channel=self.channel,
             exceptions=self.exceptions,
+            max_in_flight=self.max_in_flight,
+            concurrency=self.concurrency,
+            content_type=self.content_type,
+            executor=self.executor,
+            offload_threshold=self.offload_threshold,
+            cache=self.cache,
+            coalesce=self.coalesce,
+            batch_size=self.batch_size,
+            batch_window=self.batch_window,
         )
 
         self._has_implementation = True
@@ -175,16 +543,126 @@ class remote_procedure_model[I, O](_shared.procedure_model[I, O]):
         return procedure
 
 
+CACHE_INVALIDATION_TOPIC = "_cache_.invalidate"
+
+# caches by uri, shared by the declaration and the implementation of a procedure
+_result_caches: dict[str, _shared.result_cache] = {}
+
+# sessions that receive invalidations
+_invalidation_subscribers = weakref.WeakSet[_session.Almanet]()
+
+
+def invalidate_cache(
+    uri: str,
+) -> asyncio.Task[None]:
+    """
+    Clears cached results of the uri in this process at once and broadcasts the invalidation to other processes.
+    Processes receive invalidations after their first cached call of any procedure.
+    """
+    cache = _result_caches.get(uri)
+    if cache is not None:
+        cache.clear()
+    return _session.get_active_session().produce(CACHE_INVALIDATION_TOPIC, uri)
+
+
+def _subscribe_cache_invalidation(
+    session: _session.Almanet,
+) -> None:
+    if session in _invalidation_subscribers:
+        return
+
+    _invalidation_subscribers.add(session)
+    session._background_tasks.schedule(_consume_cache_invalidations(session), daemon=True)
+
+
+async def _consume_cache_invalidations(
+    session: _session.Almanet,
+) -> None:
+    # every session has its own channel to receive a copy of each invalidation
+    messages_stream, _ = await session.consume(CACHE_INVALIDATION_TOPIC, f"{session.id}#ephemeral")
+    async for message in messages_stream:
+        try:
+            uri = _shared.serialize_any_json(message.body)
+            cache = _result_caches.get(uri)
+            if cache is not None:
+                cache.clear()
+        except:
+            _session.logger.exception("during invalidate cache", extra={"incoming_message": str(message)})
+        await message.commit()
+
+
+def _find_procedure(
+    module: str,
+    service_uri: str,
+    uri: str,
+) -> remote_procedure_model:
+    importlib.import_module(module)
+    service = get_service(service_uri)
+    if service is not None:
+        for procedure in service.procedures:
+            if procedure.uri == uri:
+                return procedure
+    raise LookupError(f"procedure {uri} not found in {module}")
+
+
+def _run_procedure(
+    procedure: remote_procedure_model,
+    payload: typing.Any,
+    session: _session.Almanet | None,
+) -> typing.Any:
+    result = procedure.function(payload, session=session)
+    if inspect.iscoroutine(result):
+        # the worker has no running loop, async procedures get their own
+        result = asyncio.run(result)
+    return result
+
+
+def _execute_off_loop(
+    procedure: remote_procedure_model,
+    payload: bytes,
+    content_type: str,
+    session: _session.Almanet | None,
+) -> tuple[bool, typing.Any]:
+    """
+    Runs in a pool worker.
+    Returns False and the encoded result, or True and the name with the encoded payload of `rpc_exception`,
+    names of exceptions do not survive pickling.
+    """
+    codec = _shared.get_wire_codec(content_type)
+    try:
+        __payload = procedure._decode_payload(payload, codec)
+        result = _run_procedure(procedure, __payload, session)
+        return False, codec.encode(result)
+    except _session.rpc_exception as e:
+        return True, (e.name, codec.encode(e.payload))
+
+
 class remote_service:
     def __init__(
         self,
         prepath: str,
         tags: set[str] | None = None,
         include_to_api: bool = False,
+        workers: int = 1,
+        max_workers: int | None = None,
+        multiplexed: bool = False,
     ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be positive")
+
+        if max_workers is not None and max_workers < workers:
+            raise ValueError("max_workers must not be less than workers")
+
         self.pre: str = prepath
         self.default_tags: set[str] = set(tags or [])
         self.include_to_api: bool = include_to_api
+        # number of processes `serve_multiple` runs for this service, up to `max_workers` with autoscaling
+        self.workers: int = workers
+        self.max_workers: int = max_workers or workers
+        # if True, one consumer receives invocations of all procedures and routes them by uri,
+        # callers must declare the service as multiplexed too
+        self.multiplexed: bool = multiplexed
+        self.multiplexed_uri: str = f"_service_.{prepath}"
         self.procedures: list[remote_procedure_model] = []
         self.background_tasks = _shared.background_tasks()
         self._post_join_event = _shared.observable_event()
@@ -213,6 +691,15 @@ class remote_service:
         uri: typing.NotRequired[str]
         channel: typing.NotRequired[str]
         exceptions: typing.NotRequired[set[type[remote_exception]]]
+        max_in_flight: typing.NotRequired[int | None]
+        concurrency: typing.NotRequired[int | None]
+        content_type: typing.NotRequired[str]
+        executor: typing.NotRequired[_shared.executor_kind]
+        offload_threshold: typing.NotRequired[int | None]
+        cache: typing.NotRequired[_shared.result_cache | None]
+        coalesce: typing.NotRequired[bool]
+        batch_size: typing.NotRequired[int | None]
+        batch_window: typing.NotRequired[float]
 
     @typing.overload
     def public_procedure[I, O](
@@ -280,12 +767,12 @@ class remote_service:
         **extra,
     ) -> None:
         async def procedure(*args, **kwargs):
-            return {
+            return _shared.dump({
                 "session_id": session.id,
                 "session_version": session.version,
                 "routes": list(self.routes),
                 **extra,
-            }
+            })
 
         session.register(
             "_schema_.client",
@@ -293,25 +780,32 @@ class remote_service:
             channel=session.id,
         )
 
-    def _share_procedure_schema(
+    def _procedure_schema(
         self,
         session: _session.Almanet,
         registration: remote_procedure_model,
-    ) -> None:
+    ) -> dict:
         tags = registration.tags | self.default_tags
         if len(tags) == 0:
             tags = {"default"}
 
+        return {
+            "session_id": session.id,
+            "session_version": session.version,
+            "uri": registration.uri,
+            "channel": registration.channel,
+            "validate": registration.validate,
+            "tags": tags,
+            **registration.json_schema,
+        }
+
+    def _share_procedure_schema(
+        self,
+        session: _session.Almanet,
+        registration: remote_procedure_model,
+    ) -> None:
         async def procedure(*args, **kwargs):
-            return {
-                "session_id": session.id,
-                "session_version": session.version,
-                "uri": registration.uri,
-                "channel": registration.channel,
-                "validate": registration.validate,
-                "tags": tags,
-                **registration.json_schema,
-            }
+            return _shared.dump(self._procedure_schema(session, registration))
 
         session.register(
             f"_schema_.{registration.uri}.{registration.channel}",
@@ -319,22 +813,92 @@ class remote_service:
             channel=registration.channel,
         )
 
+    def _share_multiplexed_schema(
+        self,
+        session: _session.Almanet,
+        registrations: list[remote_procedure_model],
+    ) -> None:
+        """
+        Shares the schemas of multiplexed procedures by a single procedure,
+        so a multiplexed service does not need a consumer for every procedure.
+        """
+
+        async def procedure(*args, **kwargs):
+            return _shared.dump({
+                "session_id": session.id,
+                "session_version": session.version,
+                "uri": self.multiplexed_uri,
+                "channel": _session.DEFAULT_CHANNEL,
+                "procedures": [self._procedure_schema(session, i) for i in registrations],
+            })
+
+        session.register(
+            f"_schema_.{self.multiplexed_uri}.{_session.DEFAULT_CHANNEL}",
+            procedure,
+            channel=_session.DEFAULT_CHANNEL,
+        )
+
+    def _share_multiplexed(
+        self,
+        session: _session.Almanet,
+        procedures: list[remote_procedure_model],
+    ) -> None:
+        routes = {i.uri: i for i in procedures}
+        # the shared consumer receives for all procedures, their concurrency is limited in dispatch
+        limiters = {i.uri: asyncio.Semaphore(i.concurrency) for i in procedures if i.concurrency is not None}
+
+        async def dispatch(
+            payload: bytes,
+            session: _session.Almanet,
+        ) -> bytes:
+            invocation = _session.get_current_invocation()
+            uri = "" if invocation is None else invocation.uri
+            procedure = routes.get(uri)
+            if procedure is None:
+                raise _session.rpc_exception(f"{uri!r} not found in {self.pre}", name="procedure_not_found")
+
+            limiter = limiters.get(uri)
+            if limiter is None:
+                return await procedure._remote_execution(payload, session)
+            async with limiter:
+                return await procedure._remote_execution(payload, session)
+
+        session.register(
+            self.multiplexed_uri,
+            dispatch,
+            max_in_flight=sum(i.max_in_flight or i.concurrency or 1 for i in procedures),
+        )
+
     def _share_all(
         self,
         session: _session.Almanet,
     ) -> None:
         _session.logger.info(f"Sharing {self.pre} procedures")
 
+        multiplexed = [i for i in self.procedures if i._via is not None]
+        if len(multiplexed) > 0:
+            self._share_multiplexed(session, multiplexed)
+            included = [i for i in multiplexed if i.include_to_api]
+            if len(included) > 0:
+                self._share_multiplexed_schema(session, included)
+
         for procedure in self.procedures:
+            if procedure._via is not None:
+                continue
+
+            if procedure.include_to_api:
+                self._share_procedure_schema(session, procedure)
+
             session.register(
                 procedure.uri,
-                procedure._remote_execution,
+                procedure._remote_execution if procedure.batch_size is None else procedure._remote_execution_batch,
                 channel=procedure.channel,
+                max_in_flight=procedure.max_in_flight,
+                concurrency=procedure.concurrency,
+                batch_size=procedure.batch_size,
+                batch_window=procedure.batch_window,
             )
 
-            if procedure.include_to_api:
-                self._share_procedure_schema(session, procedure)
-
         if self.include_to_api:
             self._share_self_schema(session)
 
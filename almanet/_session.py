@@ -1,5 +1,8 @@
 import asyncio
+import contextlib
+import itertools
 import logging
+import time
 import typing
 
 from . import _shared
@@ -11,8 +14,10 @@ __all__ = [
     "qmessage_model",
     "reply_event_model",
     "rpc_exception",
+    "outbound_queue_full",
     "Almanet",
     "get_active_session",
+    "get_current_invocation",
 ]
 
 
@@ -20,6 +25,15 @@ logger = logging.getLogger("almanet")
 
 DEFAULT_CHANNEL = "almanet.python"
 
+# uris of multiplexed consumers by procedure uri, for procedures of multiplexed services declared in this process,
+# invocations without explicit `via` are routed through them
+multiplexed_uris: dict[str, str] = {}
+
+# reply commits in flight per reply consumer, also the RDY of reply consumers
+PIPELINED_REPLY_COMMITS = 1024
+# tasks committing replies per reply consumer
+REPLY_COMMIT_WORKERS = 16
+
 
 @_shared.dataclass(slots=True)
 class qmessage_model[T: bytes]:
@@ -34,6 +48,12 @@ class qmessage_model[T: bytes]:
     commit: typing.Callable[[], typing.Awaitable[None]]
     rollback: typing.Callable[[], typing.Awaitable[None]]
 
+    def __repr__(self) -> str:
+        return (
+            f"qmessage_model(id={self.id!r}, timestamp={self.timestamp}, "
+            f"body={_shared.truncate_payload(self.body)}, attempts={self.attempts})"
+        )
+
 
 type returns_consumer[T: bytes] = tuple[typing.AsyncIterable[qmessage_model[T]], typing.Callable[[], None]]
 
@@ -59,11 +79,27 @@ class client_iface(typing.Protocol):
     ) -> None:
         raise NotImplementedError()
 
+    async def produce_many(
+        self,
+        topic: str,
+        messages: typing.Sequence[str | bytes],
+    ) -> None:
+        """
+        Publishes multiple messages to the topic in one round trip (NSQ `MPUB`).
+        """
+        raise NotImplementedError()
+
     async def consume(
         self,
         topic: str,
         channel: str,
+        *,
+        max_in_flight: int | None = None,
     ) -> returns_consumer[bytes]:
+        """
+        Args:
+        - max_in_flight: how many unacknowledged messages the broker may deliver (NSQ `RDY`), client default if None.
+        """
         raise NotImplementedError()
 
     async def close(self) -> None:
@@ -78,13 +114,36 @@ class invoke_event_model:
 
     id: str
     caller_id: str
+    # memoryview slice of the message body if the envelope is framed
     payload: bytes
     reply_topic: str
+    # unix timestamp after which the caller no longer waits for the reply, sessions must have synchronized clocks
+    deadline: float | None = None
+    # wire format of the payload, the reply is encoded in the same format
+    content_type: str = _shared.JSON_CONTENT_TYPE
+    # procedure to execute if the invocation is sent to a multiplexed topic, see `remote_service`
+    uri: str = ""
+
+    @property
+    def time_left(self) -> float | None:
+        """
+        Seconds left before the deadline or None if the invocation has no deadline.
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
 
     @property
     def expired(self) -> bool:
-        # TODO
-        return False
+        time_left = self.time_left
+        return time_left is not None and time_left <= 0
+
+    def __repr__(self) -> str:
+        return (
+            f"invoke_event_model(id={self.id!r}, caller_id={self.caller_id!r}, "
+            f"payload={_shared.truncate_payload(self.payload)}, reply_topic={self.reply_topic!r}, "
+            f"deadline={self.deadline}, content_type={self.content_type!r}, uri={self.uri!r})"
+        )
 
 
 @_shared.dataclass(slots=True)
@@ -96,6 +155,13 @@ class reply_event_model:
     call_id: str
     is_exception: bool
     payload: bytes
+    content_type: str = _shared.JSON_CONTENT_TYPE
+
+    def __repr__(self) -> str:
+        return (
+            f"reply_event_model(call_id={self.call_id!r}, is_exception={self.is_exception}, "
+            f"payload={_shared.truncate_payload(self.payload)}, content_type={self.content_type!r})"
+        )
 
 
 @_shared.dataclass(slots=True)
@@ -104,21 +170,112 @@ class _reply_exception_model:
     payload: bytes
 
 
+_INVOKE_FRAME = 1
+_REPLY_FRAME = 2
+_IS_EXCEPTION_FLAG = 1
+
+
+def _dump_envelope(
+    envelope: invoke_event_model | reply_event_model,
+    codec: _shared.wire_codec,
+    framed: bool,
+) -> bytes:
+    if not framed:
+        return codec.encode(envelope)
+
+    if isinstance(envelope, invoke_event_model):
+        fields = [envelope.content_type, envelope.id, envelope.caller_id, envelope.reply_topic]
+        if len(envelope.uri) > 0:
+            fields.append(envelope.uri)
+        return _shared.pack_frame(
+            _INVOKE_FRAME,
+            0,
+            envelope.deadline,
+            fields,
+            envelope.payload,
+        )
+
+    return _shared.pack_frame(
+        _REPLY_FRAME,
+        _IS_EXCEPTION_FLAG if envelope.is_exception else 0,
+        None,
+        (envelope.content_type, envelope.call_id),
+        envelope.payload,
+    )
+
+
+def _load_envelope[T: invoke_event_model | reply_event_model](
+    data: bytes,
+    model: type[T],
+) -> tuple[T, bool]:
+    """
+    Returns the envelope and True if it was framed.
+    """
+    if not _shared.is_framed(data):
+        codec = _shared.detect_wire_codec(data)
+        return codec.decode(data, model), False
+
+    frame = _shared.unpack_frame(data)
+    if model is invoke_event_model and frame.kind == _INVOKE_FRAME:
+        content_type, invocation_id, caller_id, reply_topic = frame.fields[:4]
+        envelope = invoke_event_model(
+            id=invocation_id,
+            caller_id=caller_id,
+            payload=frame.payload,  # type: ignore
+            reply_topic=reply_topic,
+            deadline=frame.deadline,
+            content_type=content_type,
+            uri=frame.fields[4] if len(frame.fields) > 4 else "",
+        )
+    elif model is reply_event_model and frame.kind == _REPLY_FRAME:
+        content_type, call_id = frame.fields[:2]
+        envelope = reply_event_model(
+            call_id=call_id,
+            is_exception=bool(frame.flags & _IS_EXCEPTION_FLAG),
+            payload=frame.payload,  # type: ignore
+            content_type=content_type,
+        )
+    else:
+        raise ValueError(f"unexpected frame kind {frame.kind} for {model.__name__}")
+    return envelope, True  # type: ignore
+
+
 class rpc_exception(Exception):
-    __slots__ = ("name", "payload")
+    __slots__ = ("name", "payload", "content_type")
 
     def __init__(
         self,
         payload: typing.Any = None,
         name: str | None = None,
+        content_type: str = _shared.JSON_CONTENT_TYPE,
     ) -> None:
         self.name = name or self.__class__.__name__
         self.payload = payload
+        # wire format of the payload, if it was received encoded
+        self.content_type = content_type
 
     def __str__(self) -> str:
         return f"{self.name}: {self.payload}"
 
 
+def _load_reply_exception(
+    reply_event: reply_event_model,
+) -> rpc_exception:
+    codec = _shared.get_wire_codec(reply_event.content_type)
+    reply_exception = codec.decode(reply_event.payload, _reply_exception_model)
+    return rpc_exception(
+        reply_exception.payload,
+        name=reply_exception.name,
+        content_type=reply_event.content_type,
+    )
+
+
+class outbound_queue_full(Exception):
+    """
+    Raised when the outbound queue of a session reached its high water mark.
+    """
+
+
 @_shared.dataclass(slots=True)
 class registration_model:
     """
@@ -129,6 +286,11 @@ class registration_model:
     channel: str
     procedure: typing.Callable
     session: "Almanet"
+    max_in_flight: int | None = None
+    concurrency: int | None = None
+    # if specified, the procedure takes a list of invocations and returns a reply payload or exception for each
+    batch_size: int | None = None
+    batch_window: float = 0.005
 
     @property
     def __name__(self):
@@ -138,54 +300,361 @@ class registration_model:
         self,
         invocation: invoke_event_model,
     ) -> reply_event_model:
-        __log_extra = {"registration": str(self), "invocation": str(invocation)}
+        """
+        Executes the procedure and returns the reply.
+
+        Raises:
+        - TimeoutError: if the invocation deadline passed during execution.
+        """
+        codec = _shared.get_wire_codec(invocation.content_type)
+        deadline = asyncio.timeout(invocation.time_left)
+        current_invocation_token = _current_invocation.set(invocation)
+        metrics = self.session._metrics
+        # multiplexed invocations are reported by the procedure they route to
+        uri = invocation.uri or self.uri
+        metrics.in_flight.inc(uri=uri)
+        begin_time = time.perf_counter()
         try:
-            logger.debug(f"trying to execute procedure {self.uri}", extra=__log_extra)
-            reply_payload = await self.procedure(
-                invocation.payload,
-                session=self.session,
-            )
+            if self.session._debug_sampled(invocation.id):
+                logger.debug(f"trying to execute procedure {self.uri}", extra={"invocation": str(invocation)})
+            async with deadline:
+                reply_payload = await self.procedure(
+                    invocation.payload,
+                    session=self.session,
+                )
             is_exception = False
         except Exception as e:
-            is_exception = True
-
-            if isinstance(e, rpc_exception):
-                reply_exception = _reply_exception_model(e.name, _shared.dump(e.payload))
-            else:
-                logger.exception("during execute procedure", extra=__log_extra)
-                reply_exception = _reply_exception_model("InternalError", b"oops")
+            if deadline.expired():
+                raise e
 
-            reply_payload = _shared.dump(reply_exception)
+            is_exception = True
+            reply_payload = self._encode_exception(invocation, codec, e)
+        finally:
+            metrics.execute_duration.observe(time.perf_counter() - begin_time, uri=uri)
+            metrics.in_flight.dec(uri=uri)
+            _current_invocation.reset(current_invocation_token)
 
         return reply_event_model(
             call_id=invocation.id,
             is_exception=is_exception,
             payload=reply_payload,
+            content_type=invocation.content_type,
+        )
+
+    def _encode_exception(
+        self,
+        invocation: invoke_event_model,
+        codec: _shared.wire_codec,
+        e: Exception,
+    ) -> bytes:
+        self.session._metrics.execute_errors.inc(
+            uri=invocation.uri or self.uri,
+            error=getattr(e, "name", None) or type(e).__name__,
         )
 
+        if isinstance(e, rpc_exception):
+            reply_exception = _reply_exception_model(e.name, codec.encode(e.payload))
+        else:
+            logger.error(
+                f"during execute procedure {self.uri}",
+                exc_info=e,
+                extra={"invocation": str(invocation)},
+            )
+            reply_exception = _reply_exception_model("InternalError", b"oops")
+
+        return codec.encode(reply_exception)
+
+    async def execute_batch(
+        self,
+        invocations: list[invoke_event_model],
+    ) -> list[reply_event_model]:
+        """
+        Executes the procedure once for all invocations and returns a reply for each.
+        An exception raised by the procedure is the reply to every invocation.
+
+        Raises:
+        - TimeoutError: if the earliest deadline of invocations passed during execution.
+        """
+        time_left = [i.time_left for i in invocations if i.time_left is not None]
+        deadline = asyncio.timeout(min(time_left) if len(time_left) > 0 else None)
+        metrics = self.session._metrics
+        metrics.in_flight.inc(len(invocations), uri=self.uri)
+        begin_time = time.perf_counter()
+        try:
+            async with deadline:
+                results = await self.procedure(invocations, session=self.session)
+            if len(results) != len(invocations):
+                raise ValueError(f"{len(results)} results returned for {len(invocations)} invocations")
+        except Exception as e:
+            if deadline.expired():
+                raise e
+            results = [e] * len(invocations)
+        finally:
+            metrics.execute_duration.observe(time.perf_counter() - begin_time, uri=self.uri)
+            metrics.in_flight.dec(len(invocations), uri=self.uri)
+
+        replies = []
+        for invocation, result in zip(invocations, results):
+            is_exception = isinstance(result, Exception)
+            if is_exception:
+                codec = _shared.get_wire_codec(invocation.content_type)
+                reply_payload = self._encode_exception(invocation, codec, result)
+            else:
+                reply_payload = result
+            replies.append(
+                reply_event_model(
+                    call_id=invocation.id,
+                    is_exception=is_exception,
+                    payload=reply_payload,
+                    content_type=invocation.content_type,
+                )
+            )
+        return replies
+
+
+class _session_metrics:
+    """
+    Instruments of a session, registered in `Almanet.metrics`.
+    """
+
+    def __init__(
+        self,
+        session: "Almanet",
+    ) -> None:
+        registry = session.metrics
+        self.call_duration = registry.histogram(
+            "almanet_call_duration_seconds",
+            "Time from call to reply by uri, including failed calls",
+        )
+        self.call_errors = registry.counter(
+            "almanet_call_errors_total",
+            "Failed calls by uri and error",
+        )
+        self.execute_duration = registry.histogram(
+            "almanet_execute_duration_seconds",
+            "Procedure execution time by uri",
+        )
+        self.execute_errors = registry.counter(
+            "almanet_execute_errors_total",
+            "Procedure executions that raised by uri and error",
+        )
+        self.in_flight = registry.gauge(
+            "almanet_invocations_in_flight",
+            "Invocations executing right now by uri",
+        )
+        self.consumer_lag = registry.histogram(
+            "almanet_consumer_lag_seconds",
+            "Time from publish to delivery by topic",
+        )
+        self.replies = registry.counter(
+            "almanet_replies_total",
+            "Replies received by reply shard",
+        )
+        self.reply_commits_pending = registry.gauge(
+            "almanet_reply_commits_pending",
+            "Received replies not acknowledged to the broker yet by reply shard",
+        )
+        self.redelivered = registry.counter(
+            "almanet_redelivered_messages_total",
+            "Messages delivered more than once by topic",
+        )
+        # highest lag by topic since the last `take_consumer_lag`
+        self._recent_lag: dict[str, float] = {}
+        # nsqd timestamps of messages received but not committed yet, by topic and message id
+        self._pending_since: dict[str, dict[str, int]] = {}
+        self.dropped_invocations = registry.counter(
+            "almanet_dropped_invocations_total",
+            "Invocations expired before execution",
+        )
+        self.cancelled_invocations = registry.counter(
+            "almanet_cancelled_invocations_total",
+            "Invocations whose deadline passed during execution",
+        )
+        self.codec_offloaded = registry.counter(
+            "almanet_codec_offloaded_total",
+            "Payloads decoded or encoded in the thread pool by uri and operation",
+        )
+        self.codec_offloaded_seconds = registry.counter(
+            "almanet_codec_offloaded_seconds_total",
+            "Event loop time saved by decoding or encoding in the thread pool, by uri and operation",
+        )
+        self.coalesced_calls = registry.counter(
+            "almanet_coalesced_calls_total",
+            "Calls that joined an identical call in flight by uri",
+        )
+        self.result_cache_hits = registry.counter(
+            "almanet_result_cache_hits_total",
+            "Calls answered from the result cache by uri",
+        )
+        self.result_cache_misses = registry.counter(
+            "almanet_result_cache_misses_total",
+            "Cached procedure calls sent to the broker by uri",
+        )
+        self.result_cache_evictions = registry.counter(
+            "almanet_result_cache_evictions_total",
+            "Results evicted from the result cache by uri",
+        )
+        registry.gauge(
+            "almanet_pending_replies",
+            "Calls waiting for the reply",
+            function=lambda: len(session._pending_replies),
+        )
+        registry.gauge(
+            "almanet_outbound_queue_depth",
+            "Produced messages and delayed calls that are not sent yet",
+            function=lambda: session.outbound_queue_depth,
+        )
+        registry.counter(
+            "almanet_codec_cache_hits_total",
+            "Codec registry lookups served from cache",
+            function=lambda: _shared.codecs.hits,
+        )
+        registry.counter(
+            "almanet_codec_cache_misses_total",
+            "Codec registry lookups that built a codec",
+            function=lambda: _shared.codecs.misses,
+        )
+        registry.counter(
+            "almanet_codec_cache_evictions_total",
+            "Codecs evicted from the codec registry",
+            function=lambda: _shared.codecs.evictions,
+        )
+
+    def observe_delivery(
+        self,
+        topic: str,
+        message: qmessage_model,
+    ) -> None:
+        # nsqd timestamps are unix time in nanoseconds, sessions must have synchronized clocks
+        lag = max(0.0, time.time() - message.timestamp / 1e9)
+        self.consumer_lag.observe(lag, topic=topic)
+        if lag > self._recent_lag.get(topic, 0):
+            self._recent_lag[topic] = lag
+        if message.attempts > 1:
+            self.redelivered.inc(topic=topic)
+
+    def track_pending(
+        self,
+        topic: str,
+        message: qmessage_model,
+    ) -> None:
+        self._pending_since.setdefault(topic, {})[message.id] = message.timestamp
+
+    def untrack_pending(
+        self,
+        topic: str,
+        message: qmessage_model,
+    ) -> None:
+        self._pending_since.get(topic, {}).pop(message.id, None)
+
+    def take_consumer_lag(
+        self,
+        topic: str,
+    ) -> float:
+        """
+        Returns the highest lag of the topic since the previous call
+        or the age of the oldest pending message if it is higher.
+        A saturated consumer receives nothing, but its pending messages keep aging.
+        """
+        lag = self._recent_lag.pop(topic, 0.0)
+        pending = self._pending_since.get(topic)
+        if pending:
+            lag = max(lag, time.time() - min(pending.values()) / 1e9)
+        return lag
+
+
+@_shared.dataclass(slots=True)
+class _flight:
+    task: asyncio.Task[reply_event_model]
+    waiters: int = 0
+
 
 class Almanet:
     """
     Represents a session, connected to message broker.
+
+    Args:
+    - client: message broker client.
+    - outbound_high_water: maximum number of pending produced messages, unlimited if None.
+    - outbound_low_water: number of pending produced messages to accept new ones again, half of high water by default.
+    - framed_envelopes: send invocations as a binary header followed by raw payload bytes,
+      procedures receive the payload as `memoryview`. Replies always use the framing of the invocation.
+    - log_sample_every: at debug level, log 1 in N invocations of each uri.
+    - reply_shards: number of reply topics, each with its own consumer, calls spread their replies between them.
     """
 
     def __init__(
         self,
         client: client_iface,
+        *,
+        outbound_high_water: int | None = None,
+        outbound_low_water: int | None = None,
+        framed_envelopes: bool = False,
+        log_sample_every: int = 1,
+        reply_shards: int = 1,
     ) -> None:
+        if reply_shards < 1:
+            raise ValueError("reply_shards must be positive")
+
         self.id = _shared.new_id()
         self.reply_topic = f"_rpc_._reply_.{self.id}#ephemeral"
+        self.reply_topics = [self.reply_topic]
+        self.reply_topics.extend(f"_rpc_._reply_.{self.id}.{i}#ephemeral" for i in range(1, reply_shards))
+        self._reply_topics_cycle = itertools.cycle(self.reply_topics)
+        self._reply_consumers: list[asyncio.Task[None]] = []
         self.joined = False
+        self.framed_envelopes = framed_envelopes
         self._client = client
+        self._log_sampler = _shared.log_sampler(log_sample_every)
         self._background_tasks = _shared.background_tasks()
+        self._outbound_queue = _shared.watermark_limiter(outbound_high_water, outbound_low_water)
         self._post_join_event = _shared.observable_event()
         self._leave_event = _shared.observable_event()
-        self._pending_replies: typing.MutableMapping[str, asyncio.Future[reply_event_model]] = {}
+        # calls waiting for replies, expired in batches instead of a timer per call
+        self._pending_replies = _shared.deadline_table[reply_event_model]()
+        self._pending_multicalls: typing.MutableMapping[str, asyncio.Queue[reply_event_model]] = {}
+        # coalesced calls in flight by uri, content type and encoded payload
+        self._flights: dict[tuple[str, str, bytes], _flight] = {}
+        self.metrics = _shared.metrics_registry()
+        self._metrics = _session_metrics(self)
+
+    @property
+    def dropped_invocations(self) -> int:
+        """
+        Number of invocations expired before execution.
+        """
+        return int(self._metrics.dropped_invocations.value())
+
+    @property
+    def cancelled_invocations(self) -> int:
+        """
+        Number of invocations whose deadline passed during execution.
+        """
+        return int(self._metrics.cancelled_invocations.value())
+
+    async def serve_metrics(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+    ) -> asyncio.Server:
+        """
+        Exposes metrics in Prometheus text format over HTTP, the server is closed when the session leaves.
+        """
+        server = await self.metrics.serve(host, port)
+        self._leave_event.add_observer(server.close)
+        return server
 
     @property
     def version(self) -> float:
         return 0.1
 
+    def _debug_sampled(
+        self,
+        invocation_id: str,
+    ) -> bool:
+        # checked before formatting anything on the message hot path
+        return logger.isEnabledFor(logging.DEBUG) and self._log_sampler.sampled(invocation_id)
+
     async def _produce(
         self,
         uri: str,
@@ -199,12 +668,35 @@ class Almanet:
             raise e
 
         try:
-            logger.debug(f"trying to produce {uri} topic")
             await self._client.produce(uri, message_body, delay=delay)
         except Exception as e:
             logger.exception(f"during produce {uri} topic")
             raise e
 
+    @property
+    def outbound_queue_depth(self) -> int:
+        """
+        Number of produced messages and delayed calls that are not sent yet.
+        """
+        return self._outbound_queue.depth
+
+    def _schedule_outbound(
+        self,
+        coroutine: typing.Coroutine,
+    ) -> asyncio.Task[None]:
+        task = self._background_tasks.schedule(coroutine)
+        task.add_done_callback(lambda _: self._outbound_queue.release())
+        return task
+
+    def _try_schedule_outbound(
+        self,
+        coroutine: typing.Coroutine,
+    ) -> asyncio.Task[None]:
+        if not self._outbound_queue.try_acquire():
+            coroutine.close()
+            raise outbound_queue_full(f"{self._outbound_queue.depth} messages pending")
+        return self._schedule_outbound(coroutine)
+
     def produce(
         self,
         uri: str,
@@ -213,21 +705,41 @@ class Almanet:
     ) -> asyncio.Task[None]:
         """
         Produce a message with a specified topic and payload.
+
+        Raises:
+        - outbound_queue_full: if the outbound queue reached its high water mark.
         """
-        return self._background_tasks.schedule(self._produce(uri, payload, delay=delay))
+        return self._try_schedule_outbound(self._produce(uri, payload, delay=delay))
+
+    async def produce_when_ready(
+        self,
+        uri: str,
+        payload: typing.Any,
+        delay: int = 0,
+    ) -> asyncio.Task[None]:
+        """
+        Like `produce`, but waits while the outbound queue is above its low water mark instead of raising.
+        """
+        await self._outbound_queue.acquire()
+        return self._schedule_outbound(self._produce(uri, payload, delay=delay))
 
     async def consume(
         self,
         topic: str,
         channel: str,
+        *,
+        max_in_flight: int | None = None,
     ) -> returns_consumer:
         """
         Consume messages from a message broker with the specified topic and channel.
         It returns a tuple of a stream of messages and a function that can stop consumer.
+
+        Args:
+        - max_in_flight: how many unacknowledged messages the broker may deliver to this consumer.
         """
         logger.debug(f"trying to consume {topic}:{channel}")
 
-        messages_stream, stop_consumer = await self._client.consume(topic, channel)
+        messages_stream, stop_consumer = await self._client.consume(topic, channel, max_in_flight=max_in_flight)
 
         def __stop_consumer():
             logger.warning(f"trying to stop consumer {topic}")
@@ -237,40 +749,99 @@ class Almanet:
 
         return messages_stream, __stop_consumer
 
+    def _next_reply_topic(self) -> str:
+        return next(self._reply_topics_cycle)
+
+    async def _commit_replies(
+        self,
+        commits: asyncio.Queue[qmessage_model | None],
+        shard: str,
+    ) -> None:
+        while True:
+            message = await commits.get()
+            if message is None:
+                return
+
+            try:
+                await message.commit()
+            except:
+                logger.exception("during commit reply", extra={"incoming_message": str(message)})
+            finally:
+                self._metrics.reply_commits_pending.dec(shard=shard)
+
     async def _consume_replies(
         self,
         ready_event: asyncio.Event,
+        shard: int = 0,
     ) -> None:
+        reply_topic = self.reply_topics[shard]
+        shard_label = str(shard)
+        # the broker delivers the next replies while the previous ones are committed
         messages_stream, _ = await self.consume(
-            self.reply_topic,
+            reply_topic,
             channel=f"{DEFAULT_CHANNEL}#ephemeral",
+            max_in_flight=PIPELINED_REPLY_COMMITS,
         )
-        logger.debug("reply event consumer begin")
-        serializer = _shared.serialize_json(reply_event_model)
+        # bounds commits in flight, the consumer waits once the broker falls behind
+        commits = asyncio.Queue[qmessage_model | None](PIPELINED_REPLY_COMMITS)
+        workers = [
+            self._background_tasks.schedule(self._commit_replies(commits, shard_label), daemon=True)
+            for _ in range(REPLY_COMMIT_WORKERS)
+        ]
+        logger.debug(f"reply event consumer {shard} begin")
         ready_event.set()
         async for message in messages_stream:
-            __log_extra = {"incoming_message": str(message)}
+            self._metrics.observe_delivery(reply_topic, message)
+            self._metrics.replies.inc(shard=shard_label)
             try:
-                reply_event = serializer(message.body)
-                __log_extra["reply_event"] = str(reply_event)
-                logger.debug("new reply", extra=__log_extra)
+                reply_event, _ = _load_envelope(message.body, reply_event_model)
+                if self._debug_sampled(reply_event.call_id):
+                    logger.debug("new reply", extra={"reply_event": str(reply_event)})
 
                 pending = self._pending_replies.get(reply_event.call_id)
-                if pending is None:
-                    logger.warning("pending event not found", extra=__log_extra)
+                collector = self._pending_multicalls.get(reply_event.call_id)
+                if pending is not None:
+                    if not pending.done():
+                        pending.set_result(reply_event)
+                elif collector is not None:
+                    collector.put_nowait(reply_event)
                 else:
-                    pending.set_result(reply_event)
+                    logger.warning("pending event not found", extra={"reply_event": str(reply_event)})
             except:
-                logger.exception("during parse reply", extra=__log_extra)
+                logger.exception("during parse reply", extra={"incoming_message": str(message)})
 
-            await message.commit()
-            logger.debug("successful commit", extra=__log_extra)
-        logger.debug("reply event consumer end")
+            # the next reply is read while the broker acknowledges this one
+            self._metrics.reply_commits_pending.inc(shard=shard_label)
+            await commits.put(message)
+
+        # received replies are committed before the connection closes
+        for _ in workers:
+            await commits.put(None)
+        await asyncio.wait(workers)
+        logger.debug(f"reply event consumer {shard} end")
 
     _call_args = tuple[str, typing.Any]
 
     class _call_kwargs(typing.TypedDict):
         timeout: typing.NotRequired[int]
+        content_type: typing.NotRequired[str]
+
+    def _make_invocation(
+        self,
+        payload: typing.Any,
+        codec: _shared.wire_codec,
+        invocation_id: str,
+        reply_topic: str,
+        deadline: float | None,
+    ) -> invoke_event_model:
+        return invoke_event_model(
+            id=invocation_id,
+            caller_id=self.id,
+            payload=codec.encode(payload),
+            reply_topic=reply_topic,
+            deadline=deadline,
+            content_type=codec.content_type,
+        )
 
     async def _delay_call(
         self,
@@ -280,130 +851,466 @@ class Almanet:
         /,
         _invocation_id: str | None = None,
         _reply_topic: str = "",
+        _timeout: float | None = None,
+        _content_type: str = _shared.JSON_CONTENT_TYPE,
+        _via: str | None = None,
     ) -> None:
-        invocation = invoke_event_model(
-            id=_invocation_id or _shared.new_id(),
-            caller_id=self.id,
-            payload=_shared.dump(payload),
-            reply_topic=_reply_topic,
+        codec = _shared.get_wire_codec(_content_type)
+        invocation = self._make_invocation(
+            payload,
+            codec,
+            _invocation_id or _shared.new_id(),
+            _reply_topic,
+            None if _timeout is None else time.time() + _timeout,
         )
+        _via = _via or multiplexed_uris.get(uri)
+        if _via is not None:
+            invocation.uri = uri
 
-        __log_extra = {"invoke_event": str(invocation)}
-        logger.debug(f"trying to call {uri=} {delay=}", extra=__log_extra)
+        if self._debug_sampled(invocation.id):
+            logger.debug(f"trying to call {uri=} {delay=}", extra={"invoke_event": str(invocation)})
 
-        await self._produce(f"_rpc_.{uri}", invocation, delay=delay)
+        message_body = _dump_envelope(invocation, codec, self.framed_envelopes)
+        await self._produce(f"_rpc_.{_via or uri}", message_body, delay=delay)
 
     def delay_call(
         self,
         uri: str,
         payload,
         delay: int = 0,
+        via: str | None = None,
     ) -> None:
-        self._background_tasks.schedule(self._delay_call(uri, payload, delay))
+        """
+        Invokes the remote procedure without waiting for the reply.
+
+        Args:
+        - via: uri of the multiplexed consumer that routes the invocation to the procedure, see `remote_service`.
+
+        Raises:
+        - outbound_queue_full: if the outbound queue reached its high water mark.
+        """
+        self._try_schedule_outbound(self._delay_call(uri, payload, delay, _via=via))
+
+    async def delay_call_when_ready(
+        self,
+        uri: str,
+        payload,
+        delay: int = 0,
+        via: str | None = None,
+    ) -> None:
+        """
+        Like `delay_call`, but waits while the outbound queue is above its low water mark instead of raising.
+        """
+        await self._outbound_queue.acquire()
+        self._schedule_outbound(self._delay_call(uri, payload, delay, _via=via))
 
     async def _call(
         self,
         uri: str,
         payload,
         timeout: int = 60,
+        content_type: str = _shared.JSON_CONTENT_TYPE,
+        via: str | None = None,
     ) -> reply_event_model:
         invocation_id = _shared.new_id()
 
-        __log_extra = {"uri": uri, "timeout": timeout, "invocation_id": invocation_id}
-
+        begin_time = time.perf_counter()
+        deadline = asyncio.get_running_loop().time() + timeout
         try:
-            async with asyncio.timeout(timeout):
-                pending_reply_event = asyncio.Future[reply_event_model]()
-                self._pending_replies[invocation_id] = pending_reply_event
-
-                await self._delay_call(
-                    uri,
-                    payload,
-                    _invocation_id=invocation_id,
-                    _reply_topic=self.reply_topic,
-                )
-
-                reply_event = await pending_reply_event
-                __log_extra["reply_event"] = str(reply_event)
-                logger.debug(f"invocation {uri=} respond", extra=__log_extra)
+            # fails with TimeoutError once the timeout passes
+            pending_reply_event = self._pending_replies.add(invocation_id, timeout)
 
-                if reply_event.is_exception:
-                    serializer = _shared.serialize_json(_reply_exception_model)
-                    reply_exception = serializer(reply_event.payload)
-                    raise rpc_exception(
-                        reply_exception.payload,
-                        name=reply_exception.name,
+            try:
+                # a stalled publish must not hold the caller past the timeout either
+                async with asyncio.timeout_at(deadline):
+                    await self._delay_call(
+                        uri,
+                        payload,
+                        _invocation_id=invocation_id,
+                        _reply_topic=self._next_reply_topic(),
+                        _timeout=timeout,
+                        _content_type=content_type,
+                        _via=via,
                     )
+            except BaseException:
+                # nothing replies to an invocation that was not published
+                self._pending_replies.pop(invocation_id)
+                raise
+
+            reply_event = await pending_reply_event
+            if self._debug_sampled(invocation_id):
+                logger.debug(f"invocation {uri=} respond", extra={"reply_event": str(reply_event)})
 
-                return reply_event
+            if reply_event.is_exception:
+                raise _load_reply_exception(reply_event)
+
+            return reply_event
         except Exception as e:
-            logger.error(f"during call {uri}: {e!r}", extra={**__log_extra, "error": str(e)})
+            self._metrics.call_errors.inc(uri=uri, error=getattr(e, "name", None) or type(e).__name__)
+            logger.error(
+                f"during call {uri}: {e!r}",
+                extra={"uri": uri, "timeout": timeout, "invocation_id": invocation_id, "error": str(e)},
+            )
             raise e
         finally:
+            self._metrics.call_duration.observe(time.perf_counter() - begin_time, uri=uri)
             self._pending_replies.pop(invocation_id)
 
+    async def _coalesced_call(
+        self,
+        uri: str,
+        payload,
+        timeout: int = 60,
+        content_type: str = _shared.JSON_CONTENT_TYPE,
+        via: str | None = None,
+    ) -> reply_event_model:
+        codec = _shared.get_wire_codec(content_type)
+        encoded_payload = codec.encode(payload)
+        key = (uri, content_type, encoded_payload)
+
+        flight = self._flights.get(key)
+        if flight is None:
+            task = self._background_tasks.schedule(
+                self._call(uri, encoded_payload, timeout=timeout, content_type=content_type, via=via)
+            )
+            flight = _flight(task)
+            self._flights[key] = flight
+            task.add_done_callback(lambda _: self._forget_flight(key, flight))
+        else:
+            self._metrics.coalesced_calls.inc(uri=uri)
+
+        flight.waiters += 1
+        try:
+            async with asyncio.timeout(timeout):
+                # a cancelled waiter must not cancel the call of the others
+                return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # nobody waits for the reply anymore, next calls start over
+                self._forget_flight(key, flight)
+                flight.task.cancel()
+
+    def _forget_flight(
+        self,
+        key: tuple[str, str, bytes],
+        flight: _flight,
+    ) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
     def call(
         self,
         uri: str,
         payload,
+        coalesce: bool = False,
+        via: str | None = None,
         **kwargs: typing.Unpack[_call_kwargs],
     ) -> asyncio.Task[reply_event_model]:
         """
         Executes the remote procedure using the payload.
         Returns a instance of result model.
+
+        Args:
+        - coalesce: share one invocation between identical calls in flight, the first call defines the deadline.
+        - via: uri of the multiplexed consumer that routes the invocation to the procedure, see `remote_service`.
         """
-        return self._background_tasks.schedule(self._call(uri, payload, **kwargs))
+        if coalesce:
+            return self._background_tasks.schedule(self._coalesced_call(uri, payload, via=via, **kwargs))
+        return self._background_tasks.schedule(self._call(uri, payload, via=via, **kwargs))
 
-    async def _multicall(
+    class _call_many_kwargs(_call_kwargs):
+        concurrency: typing.NotRequired[int | None]
+        via: typing.NotRequired[str | None]
+
+    async def _iter_call_many(
+        self,
+        uri: str,
+        payloads: typing.Iterable,
+        timeout: float = 60,
+        content_type: str = _shared.JSON_CONTENT_TYPE,
+        concurrency: int | None = None,
+        via: str | None = None,
+    ) -> typing.AsyncGenerator[tuple[int, reply_event_model | Exception], None]:
+        if concurrency is not None and concurrency < 1:
+            raise ValueError("concurrency must be positive")
+
+        codec = _shared.get_wire_codec(content_type)
+        via = via or multiplexed_uris.get(uri)
+        topic = f"_rpc_.{via or uri}"
+        deadline = asyncio.get_running_loop().time() + timeout
+        # every invocation expires with the whole batch
+        invocation_deadline = time.time() + timeout
+
+        unsent = enumerate(payloads)
+        failed: list[tuple[int, Exception]] = []
+        # index and send time of invocations waiting for a reply, by invocation id
+        in_flight: dict[str, tuple[int, float]] = {}
+        # replies of all invocations come through one queue instead of a future per call
+        replies = asyncio.Queue[reply_event_model]()
+
+        def take_messages() -> list[bytes]:
+            messages = []
+            while concurrency is None or len(in_flight) < concurrency:
+                item = next(unsent, None)
+                if item is None:
+                    break
+
+                index, payload = item
+                invocation_id = _shared.new_id()
+                try:
+                    invocation = self._make_invocation(
+                        payload,
+                        codec,
+                        invocation_id,
+                        self._next_reply_topic(),
+                        invocation_deadline,
+                    )
+                    if via is not None:
+                        invocation.uri = uri
+                    messages.append(_dump_envelope(invocation, codec, self.framed_envelopes))
+                except Exception as e:
+                    logger.error(f"during encode payload: {repr(e)}")
+                    failed.append((index, e))
+                    continue
+
+                in_flight[invocation_id] = (index, time.perf_counter())
+                self._pending_multicalls[invocation_id] = replies
+            return messages
+
+        def complete(
+            reply_event: reply_event_model,
+        ) -> tuple[int, reply_event_model | Exception] | None:
+            sent = in_flight.pop(reply_event.call_id, None)
+            if sent is None:
+                # redelivered reply
+                return None
+
+            self._pending_multicalls.pop(reply_event.call_id)
+            index, send_time = sent
+            self._metrics.call_duration.observe(time.perf_counter() - send_time, uri=uri)
+            if not reply_event.is_exception:
+                return index, reply_event
+
+            try:
+                error = _load_reply_exception(reply_event)
+                self._metrics.call_errors.inc(uri=uri, error=error.name)
+            except Exception as e:
+                error = e
+                self._metrics.call_errors.inc(uri=uri, error=type(e).__name__)
+            return index, error
+
+        try:
+            while True:
+                messages = take_messages()
+                if len(messages) > 0:
+                    try:
+                        await self._client.produce_many(topic, messages)
+                    except Exception as e:
+                        logger.exception(f"during produce {topic} topic")
+                        raise e
+
+                while failed:
+                    yield failed.pop(0)
+
+                if len(in_flight) == 0:
+                    break
+
+                try:
+                    # do not yield within timeout context, it would cancel the caller
+                    async with asyncio.timeout_at(deadline):
+                        ready = [await replies.get()]
+                except TimeoutError:
+                    break
+
+                # complete every reply received so far before sending the next invocations in one round trip
+                while not replies.empty():
+                    ready.append(replies.get_nowait())
+
+                for reply_event in ready:
+                    result = complete(reply_event)
+                    if result is not None:
+                        yield result
+
+            expired = sorted(index for index, _ in in_flight.values())
+            expired.extend(index for index, _ in unsent)
+            if len(expired) > 0:
+                logger.error(f"during call {uri}: {len(expired)} invocations timed out")
+                self._metrics.call_errors.inc(len(expired), uri=uri, error="TimeoutError")
+            for index in expired:
+                yield index, TimeoutError()
+        finally:
+            for invocation_id in in_flight:
+                self._pending_multicalls.pop(invocation_id, None)
+
+    def iter_call_many(
+        self,
+        uri: str,
+        payloads: typing.Iterable,
+        **kwargs: typing.Unpack[_call_many_kwargs],
+    ) -> typing.AsyncIterator[tuple[int, reply_event_model | Exception]]:
+        """
+        Executes the remote procedure once for each payload.
+        Invocations are published in bulk, replies come through one queue under a common timeout.
+        Yields the index of the payload and its reply or exception, in completion order.
+
+        Args:
+        - concurrency: maximum number of invocations in flight, all at once if None.
+        - via: uri of the multiplexed consumer that routes the invocations to the procedure, see `remote_service`.
+        """
+        return self._iter_call_many(uri, payloads, **kwargs)
+
+    async def _call_many(
+        self,
+        uri: str,
+        payloads: typing.Iterable,
+        **kwargs: typing.Unpack[_call_many_kwargs],
+    ) -> list[reply_event_model | Exception]:
+        async with contextlib.aclosing(self._iter_call_many(uri, payloads, **kwargs)) as results:
+            completed = [i async for i in results]
+        completed.sort(key=lambda i: i[0])
+        return [result for _, result in completed]
+
+    def call_many(
+        self,
+        uri: str,
+        payloads: typing.Iterable,
+        **kwargs: typing.Unpack[_call_many_kwargs],
+    ) -> asyncio.Task[list[reply_event_model | Exception]]:
+        """
+        Executes the remote procedure once for each payload.
+        Returns replies in the order of payloads, failed invocations are represented by their exceptions.
+
+        Args:
+        - concurrency: maximum number of invocations in flight, all at once if None.
+        - via: uri of the multiplexed consumer that routes the invocations to the procedure, see `remote_service`.
+        """
+        return self._background_tasks.schedule(self._call_many(uri, payloads, **kwargs))
+
+    class _multicall_kwargs(_call_kwargs):
+        expected: typing.NotRequired[int | typing.Literal["discover"] | None]
+        via: typing.NotRequired[str | None]
+
+    async def discover_peers(
+        self,
+        uri: str,
+        timeout: float = 1,
+    ) -> int:
+        """
+        Returns the number of peers that receive a multicall of the uri.
+        Every channel that serves the uri receives its own copy of an invocation.
+        Only services shared with `include_to_api` are discoverable.
+        """
+        channels = set()
+        async for reply_event in self._iter_multicall("_schema_.client", None, timeout=timeout):
+            if reply_event.is_exception:
+                continue
+            try:
+                schema = _shared.serialize_any_json(reply_event.payload)
+                for route in schema.get("routes", []):
+                    route_uri, _, route_channel = route.rpartition(":")
+                    if route_uri == uri:
+                        channels.add(route_channel)
+            except:
+                logger.exception("during parse client schema")
+        return len(channels)
+
+    async def _iter_multicall(
         self,
         uri: str,
         payload,
-        timeout: int = 60,
-    ) -> list[reply_event_model]:
-        reply_topic = f"_rpc_._replies_.{_shared.new_id()}#ephemeral"
+        timeout: float = 60,
+        expected: int | typing.Literal["discover"] | None = None,
+        content_type: str = _shared.JSON_CONTENT_TYPE,
+        via: str | None = None,
+    ) -> typing.AsyncIterator[reply_event_model]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        if expected == "discover":
+            # discovery waits for all peers until its timeout, leave the rest of the deadline to the multicall
+            expected = await self.discover_peers(uri, timeout=min(1, timeout / 2)) or None
+            if expected is None:
+                # peers without `include_to_api` services are not discoverable, wait for replies until the deadline
+                logger.debug(f"no peers of {uri} discovered")
+            timeout = max(0, deadline - loop.time())
 
-        __log_extra = {"uri": uri, "timeout": timeout, "reply_topic": reply_topic}
+        invocation_id = _shared.new_id()
 
-        messages_stream, stop_consumer = await self.consume(
-            reply_topic,
-            f"{DEFAULT_CHANNEL}#ephemeral"
-        )
+        __log_extra = {"uri": uri, "timeout": timeout, "invocation_id": invocation_id, "expected": expected}
 
-        serializer = _shared.serialize_json(reply_event_model)
+        # replies come through the session reply topic, `_consume_replies` routes them by invocation id
+        replies = asyncio.Queue[reply_event_model]()
+        self._pending_multicalls[invocation_id] = replies
 
-        result = []
+        received = 0
         try:
-            async with asyncio.timeout(timeout):
-                await self._delay_call(
-                    uri,
-                    payload,
-                    _reply_topic=reply_topic,
-                )
+            await self._delay_call(
+                uri,
+                payload,
+                _invocation_id=invocation_id,
+                _reply_topic=self._next_reply_topic(),
+                _timeout=timeout,
+                _content_type=content_type,
+                _via=via,
+            )
 
-                async for message in messages_stream:
-                    try:
-                        logger.debug("new reply event", extra=__log_extra)
-                        reply_event = serializer(message.body)
-                        result.append(reply_event)
-                    except:
-                        logger.exception("during parse reply event", extra=__log_extra)
+            while expected is None or received < expected:
+                try:
+                    # do not yield within timeout context, it would cancel the caller
+                    async with asyncio.timeout_at(deadline):
+                        reply_event = await replies.get()
+                except TimeoutError:
+                    break
+
+                logger.debug("new reply event", extra=__log_extra)
+                received += 1
+                yield reply_event
+        finally:
+            self._pending_multicalls.pop(invocation_id)
 
-                    await message.commit()
-        except TimeoutError:
-            stop_consumer()
+        logger.debug(f"multicall {uri} done, {received} replies")
 
-        logger.debug(f"multicall {uri} done")
+    def iter_multicall(
+        self,
+        uri: str,
+        payload,
+        **kwargs: typing.Unpack[_multicall_kwargs],
+    ) -> typing.AsyncIterator[reply_event_model]:
+        """
+        Execute simultaneously multiple procedures using the payload.
+        Yields replies as they arrive, until the expected number of replies is received or timeout.
 
-        return result
+        Args:
+        - expected: number of replies to wait for, "discover" to count peers using `_schema_` procedures,
+          until the timeout if no peer is discovered.
+        - via: uri of the multiplexed consumer that routes the invocation to the procedure, see `remote_service`.
+        """
+        return self._iter_multicall(uri, payload, **kwargs)
+
+    async def _multicall(
+        self,
+        uri: str,
+        payload,
+        **kwargs: typing.Unpack[_multicall_kwargs],
+    ) -> list[reply_event_model]:
+        async with contextlib.aclosing(self._iter_multicall(uri, payload, **kwargs)) as replies:
+            return [i async for i in replies]
 
     def multicall(
         self,
         uri: str,
         payload,
-        **kwargs: typing.Unpack[_call_kwargs],
+        **kwargs: typing.Unpack[_multicall_kwargs],
     ) -> asyncio.Task[list[reply_event_model]]:
         """
         Execute simultaneously multiple procedures using the payload.
+        Completes when the expected number of replies is received or timeout.
+
+        Args:
+        - expected: number of replies to wait for, "discover" to count peers using `_schema_` procedures,
+          until the timeout if no peer is discovered.
+        - via: uri of the multiplexed consumer that routes the invocation to the procedure, see `remote_service`.
         """
         return self._background_tasks.schedule(self._multicall(uri, payload, **kwargs))
 
@@ -412,52 +1319,206 @@ class Almanet:
         registration: registration_model,
         message: qmessage_model[bytes],
     ):
-        __log_extra = {"registration": str(registration), "incoming_message": str(message)}
-        serializer = _shared.serialize_json(invoke_event_model)
+        # log records are formatted only if needed, this runs for every message
+        invocation = None
         try:
-            invocation = serializer(message.body)
-            __log_extra["invocation"] = str(invocation)
-            logger.debug("new invocation", extra=__log_extra)
+            invocation, framed = _load_envelope(message.body, invoke_event_model)
+            debug = self._debug_sampled(invocation.id)
+            if debug:
+                logger.debug(f"new invocation {registration.uri}", extra={"invocation": str(invocation)})
 
             if invocation.expired:
-                logger.warning("invocation expired", extra=__log_extra)
+                self._metrics.dropped_invocations.inc()
+                logger.warning(f"invocation {registration.uri} expired", extra={"invocation": str(invocation)})
             else:
                 reply_event = await registration.execute(invocation)
                 if len(invocation.reply_topic) > 0:
-                    logger.debug(f"trying to reply {registration.uri}", extra=__log_extra)
-                    await self._produce(invocation.reply_topic, reply_event)
+                    if debug:
+                        logger.debug(f"trying to reply {registration.uri}", extra={"invocation": str(invocation)})
+                    codec = _shared.get_wire_codec(reply_event.content_type)
+                    message_body = _dump_envelope(reply_event, codec, framed)
+                    await self._produce(invocation.reply_topic, message_body)
+        except TimeoutError:
+            # the caller is not waiting for the reply anymore
+            self._metrics.cancelled_invocations.inc()
+            logger.warning(
+                f"invocation {registration.uri} cancelled, deadline exceeded",
+                extra={"invocation": str(invocation)},
+            )
         except:
-            logger.exception("during execute invocation", extra=__log_extra)
+            logger.exception(
+                f"during execute invocation {registration.uri}",
+                extra={"incoming_message": str(message), "invocation": str(invocation)},
+            )
         finally:
+            self._metrics.untrack_pending(registration.uri, message)
             await message.commit()
-            logger.debug("successful commit", extra=__log_extra)
 
     async def _consume_invocations(
         self,
         registration: registration_model,
     ) -> None:
         logger.debug(f"trying to register {registration.uri}:{registration.channel}")
-        messages_stream, _ = await self.consume(f"_rpc_.{registration.uri}", registration.channel)
+        if registration.batch_size is None:
+            # with the broker default RDY, concurrency above it would never be reached
+            max_in_flight = registration.max_in_flight or registration.concurrency
+        else:
+            # invocations of a batch are committed together, the broker must deliver a whole batch first
+            max_in_flight = registration.max_in_flight or registration.batch_size * (registration.concurrency or 1)
+        messages_stream, _ = await self.consume(
+            f"_rpc_.{registration.uri}",
+            registration.channel,
+            max_in_flight=max_in_flight,
+        )
+
+        if registration.batch_size is not None:
+            await self._consume_invocation_batches(registration, registration.batch_size, messages_stream)
+            return
+
+        concurrency = registration.concurrency or registration.max_in_flight
+        limiter = None if concurrency is None else asyncio.Semaphore(concurrency)
+
         async for message in messages_stream:
-            self._background_tasks.schedule(self._on_message(registration, message))
+            self._metrics.observe_delivery(registration.uri, message)
+            self._metrics.track_pending(registration.uri, message)
+            if limiter is None:
+                self._background_tasks.schedule(self._on_message(registration, message))
+            else:
+                # stop reading until a slot is free, the rest of backlog stays in the broker
+                await limiter.acquire()
+                task = self._background_tasks.schedule(self._on_message(registration, message))
+                task.add_done_callback(lambda _: limiter.release())
+            if not self.joined:
+                break
+        logger.debug(f"consumer {registration.uri} down")
+
+    async def _consume_invocation_batches(
+        self,
+        registration: registration_model,
+        batch_size: int,
+        messages_stream: typing.AsyncIterable[qmessage_model[bytes]],
+    ) -> None:
+        # concurrency limits batches executing at the same time
+        limiter = None if registration.concurrency is None else asyncio.Semaphore(registration.concurrency)
+        loop = asyncio.get_running_loop()
+        batch: list[qmessage_model[bytes]] = []
+        timer: asyncio.TimerHandle | None = None
+
+        def flush() -> None:
+            nonlocal batch, timer
+            if timer is not None:
+                timer.cancel()
+                timer = None
+            if len(batch) > 0:
+                self._background_tasks.schedule(self._on_batch(registration, batch, limiter))
+                batch = []
+
+        async for message in messages_stream:
+            self._metrics.observe_delivery(registration.uri, message)
+            self._metrics.track_pending(registration.uri, message)
+            batch.append(message)
+            if len(batch) >= batch_size:
+                flush()
+            elif timer is None:
+                timer = loop.call_later(registration.batch_window, flush)
             if not self.joined:
                 break
+        flush()
         logger.debug(f"consumer {registration.uri} down")
 
+    async def _on_batch(
+        self,
+        registration: registration_model,
+        messages: list[qmessage_model[bytes]],
+        limiter: asyncio.Semaphore | None,
+    ) -> None:
+        invocations: list[invoke_event_model] = []
+        framed_flags: list[bool] = []
+        try:
+            for message in messages:
+                try:
+                    invocation, framed = _load_envelope(message.body, invoke_event_model)
+                except:
+                    logger.exception(
+                        f"during parse invocation {registration.uri}",
+                        extra={"incoming_message": str(message)},
+                    )
+                    continue
+
+                if invocation.expired:
+                    self._metrics.dropped_invocations.inc()
+                    logger.warning(f"invocation {registration.uri} expired", extra={"invocation": str(invocation)})
+                    continue
+
+                invocations.append(invocation)
+                framed_flags.append(framed)
+
+            if len(invocations) == 0:
+                return
+
+            async with limiter if limiter is not None else contextlib.nullcontext():
+                replies = await registration.execute_batch(invocations)
+
+            # replies of the batch are sent concurrently
+            await asyncio.gather(
+                *[
+                    self._produce(
+                        invocation.reply_topic,
+                        _dump_envelope(reply_event, _shared.get_wire_codec(reply_event.content_type), framed),
+                    )
+                    for invocation, framed, reply_event in zip(invocations, framed_flags, replies)
+                    if len(invocation.reply_topic) > 0
+                ]
+            )
+        except TimeoutError:
+            self._metrics.cancelled_invocations.inc(len(invocations))
+            logger.warning(f"batch of {len(invocations)} invocations {registration.uri} cancelled, deadline exceeded")
+        except:
+            logger.exception(f"during execute batch {registration.uri}")
+        finally:
+            for message in messages:
+                self._metrics.untrack_pending(registration.uri, message)
+                await message.commit()
+
     def register(
         self,
         topic: str,
         procedure: typing.Callable,
         *,
         channel: str = "main",
+        max_in_flight: int | None = None,
+        concurrency: int | None = None,
+        batch_size: int | None = None,
+        batch_window: float = 0.005,
     ) -> registration_model:
         """
         Register a procedure with a specified topic and payload.
         Returns the created registration.
+
+        Args:
+        - max_in_flight: how many invocations the broker may deliver before they are committed (NSQ `RDY`),
+          defaults to `concurrency`.
+        - concurrency: how many invocations may execute at the same time, defaults to `max_in_flight`.
+        - batch_size: collect up to this many invocations and execute the procedure once for all of them,
+          the procedure takes a list of invocations and returns a reply payload or an exception for each.
+          Concurrency limits batches then.
+        - batch_window: seconds to wait for more invocations after the first invocation of a batch.
         """
         if not self.joined:
             raise RuntimeError(f"session {self.id} not joined")
 
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be positive")
+
+        if concurrency is not None and concurrency < 1:
+            raise ValueError("concurrency must be positive")
+
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be positive")
+
+        if batch_window < 0:
+            raise ValueError("batch_window must be non-negative")
+
         logger.debug(f"scheduling registration {topic}")
 
         registration = registration_model(
@@ -465,6 +1526,10 @@ class Almanet:
             channel=channel,
             procedure=procedure,
             session=self,
+            max_in_flight=max_in_flight,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            batch_window=batch_window,
         )
 
         self._background_tasks.schedule(self._consume_invocations(registration), daemon=True)
@@ -484,12 +1549,16 @@ class Almanet:
 
         await self._client.connect()
 
-        consume_replies_ready = asyncio.Event()
-        self._background_tasks.schedule(
-            self._consume_replies(consume_replies_ready),
-            daemon=True,
-        )
-        await consume_replies_ready.wait()
+        consume_replies_ready = []
+        for shard in range(len(self.reply_topics)):
+            ready_event = asyncio.Event()
+            reply_consumer = self._background_tasks.schedule(
+                self._consume_replies(ready_event, shard),
+                daemon=True,
+            )
+            self._reply_consumers.append(reply_consumer)
+            consume_replies_ready.append(ready_event.wait())
+        await asyncio.gather(*consume_replies_ready)
 
         _active_session.set(self)
 
@@ -524,6 +1593,11 @@ class Almanet:
 
         await self._leave_event.notify(timeout=timeout)
 
+        # reply consumers stop with the leave event and finish their commits
+        if len(self._reply_consumers) > 0:
+            await asyncio.wait(self._reply_consumers, timeout=timeout)
+            self._reply_consumers.clear()
+
         logger.debug(f"session {self.id} trying to close connection")
         await self._client.close()
 
@@ -536,6 +1610,15 @@ class Almanet:
 
 _active_session = _shared.new_concurrent_context()
 
+_current_invocation = _shared.new_concurrent_context()
+
+
+def get_current_invocation() -> invoke_event_model | None:
+    """
+    Returns the invocation being executed by the current procedure.
+    """
+    return _current_invocation.get(None)
+
 
 def get_active_session() -> Almanet:
     session = _active_session.get(None)
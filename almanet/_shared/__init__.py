@@ -1,25 +1,45 @@
 from dataclasses import dataclass, field
 
+from ._codec_registry import *
+from ._coalescing import *
 from ._concurrent_context import *
+from ._deadline_table import *
 from ._decoding import *
 from ._encoding import *
+from ._executors import *
+from ._framing import *
 from ._new_id import *
 from ._observable_event import *
 from ._streaming import *
 from ._background_tasks import *
 from ._procedure import *
+from ._result_cache import *
 from ._is_valid_uri import *
+from ._logging import *
+from ._metrics import *
+from ._watermark_limiter import *
+from ._wire_codecs import *
 
 __all__ = [
     "dataclass",
     "field",
+    *_codec_registry.__all__,
+    *_coalescing.__all__,
     *_concurrent_context.__all__,
+    *_deadline_table.__all__,
     *_decoding.__all__,
     *_encoding.__all__,
+    *_executors.__all__,
+    *_framing.__all__,
     *_new_id.__all__,
     *_observable_event.__all__,
     *_streaming.__all__,
     *_background_tasks.__all__,
     *_procedure.__all__,
+    *_result_cache.__all__,
     *_is_valid_uri.__all__,
+    *_logging.__all__,
+    *_metrics.__all__,
+    *_watermark_limiter.__all__,
+    *_wire_codecs.__all__,
 ]
@@ -0,0 +1,108 @@
+import asyncio
+import typing
+
+from . import _background_tasks
+
+__all__ = ["coalescing_writer"]
+
+
+class _batch:
+    __slots__ = ("messages", "done", "timer")
+
+    def __init__(self) -> None:
+        self.messages: list[bytes] = []
+        self.done = asyncio.get_running_loop().create_future()
+        # the exception is delivered to every writer, do not warn if all of them were cancelled
+        self.done.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class coalescing_writer:
+    """
+    Groups messages of the same topic written within a short window into one batch,
+    so they can be sent in one round trip (NSQ `MPUB`).
+
+    Args:
+    - flush: sends a batch of messages to the topic.
+    - window: seconds to wait for more messages after the first message of a batch.
+    - max_batch_size: sends a batch immediately when it reaches this size.
+    """
+
+    def __init__(
+        self,
+        flush: typing.Callable[[str, list[bytes]], typing.Awaitable[None]],
+        window: float = 0.001,
+        max_batch_size: int = 128,
+    ) -> None:
+        if window < 0:
+            raise ValueError("window must be non-negative")
+
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._flush_function = flush
+        self._batches: dict[str, _batch] = {}
+        self._background_tasks = _background_tasks.background_tasks()
+
+    async def write(
+        self,
+        topic: str,
+        message: bytes,
+    ) -> None:
+        """
+        Adds the message to the batch of the topic.
+        Completes when the batch is sent, raises if sending failed.
+        """
+        batch = self._batches.get(topic)
+        if batch is None:
+            batch = _batch()
+            self._batches[topic] = batch
+            loop = asyncio.get_running_loop()
+            batch.timer = loop.call_later(self.window, self._flush, topic)
+
+        batch.messages.append(message)
+        if len(batch.messages) >= self.max_batch_size:
+            self._flush(topic)
+
+        # other writers of the batch must not be affected by cancellation
+        await asyncio.shield(batch.done)
+
+    def _flush(
+        self,
+        topic: str,
+    ) -> None:
+        batch = self._batches.pop(topic, None)
+        if batch is None:
+            return
+
+        if batch.timer is not None:
+            batch.timer.cancel()
+
+        self._background_tasks.schedule(self._send(topic, batch))
+
+    async def _send(
+        self,
+        topic: str,
+        batch: _batch,
+    ) -> None:
+        try:
+            await self._flush_function(topic, batch.messages)
+            batch.done.set_result(None)
+        except asyncio.CancelledError:
+            batch.done.cancel()
+            raise
+        except Exception as e:
+            batch.done.set_exception(e)
+
+    async def close(
+        self,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Sends all pending batches and waits for completion.
+        """
+        for topic in list(self._batches):
+            self._flush(topic)
+        await self._background_tasks.complete(timeout=timeout)
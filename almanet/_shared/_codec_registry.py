@@ -0,0 +1,94 @@
+import collections
+import threading
+import typing
+
+import pydantic
+
+__all__ = [
+    "codec_registry",
+    "codecs",
+]
+
+
+class codec_registry:
+    """
+    Compiles a `pydantic.TypeAdapter` once per annotation and reuses it.
+    Adapters are evicted in least recently used order, so dynamically created types do not grow the registry forever.
+
+    Args:
+    - maxsize: maximum number of cached adapters.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._adapters = collections.OrderedDict[typing.Any, pydantic.TypeAdapter]()
+        self._lock = threading.Lock()
+        self._any_adapter = pydantic.TypeAdapter(typing.Any)
+
+    def __len__(self) -> int:
+        return len(self._adapters)
+
+    def adapter(
+        self,
+        annotation: typing.Any,
+    ) -> pydantic.TypeAdapter:
+        """
+        Returns the compiled adapter of the annotation.
+        Unhashable annotations are compiled on every call.
+        """
+        try:
+            with self._lock:
+                adapter = self._adapters.get(annotation)
+                if adapter is not None:
+                    self._adapters.move_to_end(annotation)
+                    self.hits += 1
+                    return adapter
+        except TypeError:
+            self.misses += 1
+            return pydantic.TypeAdapter(annotation)
+
+        adapter = pydantic.TypeAdapter(annotation)
+        self._store(annotation, adapter)
+        return adapter
+
+    def _store(
+        self,
+        annotation: typing.Any,
+        adapter: pydantic.TypeAdapter,
+    ) -> None:
+        with self._lock:
+            self.misses += 1
+            self._adapters[annotation] = adapter
+            while len(self._adapters) > self.maxsize:
+                self._adapters.popitem(last=False)
+                self.evictions += 1
+
+    def dumper(
+        self,
+        kind: type,
+    ) -> pydantic.TypeAdapter:
+        """
+        Returns the adapter to serialize instances of the type.
+        Falls back to runtime type inference if pydantic can not build a schema of the type.
+        """
+        try:
+            return self.adapter(kind)
+        except pydantic.PydanticSchemaGenerationError:
+            self._store(kind, self._any_adapter)
+            return self._any_adapter
+
+    def clear(self) -> None:
+        with self._lock:
+            self._adapters.clear()
+
+
+codecs = codec_registry()
@@ -0,0 +1,118 @@
+import asyncio
+import heapq
+import math
+
+__all__ = ["deadline_table"]
+
+
+class deadline_table[T]:
+    """
+    Futures by key that fail with `TimeoutError` once their timeout passes.
+    Deadlines are rounded up to buckets of `resolution` seconds and a single loop timer expires a whole bucket,
+    instead of a timer for every future.
+
+    Args:
+    - resolution: width of a bucket in seconds, futures may expire up to that much later than their timeout.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.01,
+    ) -> None:
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+
+        self.resolution = resolution
+        self._futures: dict[str, tuple[asyncio.Future[T], int]] = {}
+        self._buckets: dict[int, set[str]] = {}
+        # bucket numbers in expiration order, a bucket is pushed once when it is created
+        self._schedule: list[int] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_bucket: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._futures
+
+    def add(
+        self,
+        key: str,
+        timeout: float,
+    ) -> asyncio.Future[T]:
+        """
+        Returns a new future for the key that fails with `TimeoutError` after `timeout` seconds.
+        """
+        if key in self._futures:
+            raise ValueError(f"{key} already pending")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        bucket_number = math.ceil((loop.time() + timeout) / self.resolution)
+        self._futures[key] = (future, bucket_number)
+
+        bucket = self._buckets.get(bucket_number)
+        if bucket is None:
+            bucket = self._buckets[bucket_number] = set()
+            heapq.heappush(self._schedule, bucket_number)
+            if self._timer_bucket is None or bucket_number < self._timer_bucket:
+                self._schedule_timer(loop)
+        bucket.add(key)
+        return future
+
+    def get(
+        self,
+        key: str,
+    ) -> asyncio.Future[T] | None:
+        entry = self._futures.get(key)
+        return None if entry is None else entry[0]
+
+    def pop(
+        self,
+        key: str,
+    ) -> asyncio.Future[T] | None:
+        """
+        Removes the key, its future is no longer expired.
+        """
+        entry = self._futures.pop(key, None)
+        if entry is None:
+            return None
+
+        future, bucket_number = entry
+        bucket = self._buckets.get(bucket_number)
+        if bucket is not None:
+            bucket.discard(key)
+        return future
+
+    def _schedule_timer(
+        self,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_bucket = None
+
+        if len(self._schedule) == 0:
+            return
+
+        self._timer_bucket = self._schedule[0]
+        self._timer = loop.call_at(self._timer_bucket * self.resolution, self._expire, loop, self._timer_bucket)
+
+    def _expire(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        due_bucket: int,
+    ) -> None:
+        self._timer = None
+        self._timer_bucket = None
+        # the loop may run the timer slightly before its time
+        due_bucket = max(due_bucket, math.floor(loop.time() / self.resolution))
+        while len(self._schedule) > 0 and self._schedule[0] <= due_bucket:
+            bucket_number = heapq.heappop(self._schedule)
+            for key in self._buckets.pop(bucket_number):
+                future, _ = self._futures[key]
+                if not future.done():
+                    future.set_exception(TimeoutError())
+        self._schedule_timer(loop)
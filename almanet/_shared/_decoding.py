@@ -1,8 +1,9 @@
 import typing
 
-import pydantic
 import pydantic_core
 
+from . import _codec_registry
+
 __all__ = [
     "serialize",
     "serialize_json",
@@ -16,18 +17,25 @@ def serialize[T: typing.Any](
     if annotation is ...:
         return lambda v: v
 
-    model = pydantic.TypeAdapter(annotation)
+    model = _codec_registry.codecs.adapter(annotation)
     return model.validate_python
 
 
 def serialize_json[T: typing.Any](
     annotation: type[T] | typing.Any = ...,
-) -> typing.Callable[[bytes | str], T]:
+) -> typing.Callable[[bytes | memoryview | str], T]:
     if annotation is ...:
-        return lambda v: pydantic_core.from_json(v)
+        validate_json = pydantic_core.from_json
+    else:
+        validate_json = _codec_registry.codecs.adapter(annotation).validate_json
+
+    def decode(v: bytes | memoryview | str) -> T:
+        # payloads of framed envelopes are views of the received message
+        if isinstance(v, memoryview):
+            v = bytes(v)
+        return validate_json(v)
 
-    model = pydantic.TypeAdapter(annotation)
-    return model.validate_json
+    return decode
 
 
 serialize_any_json = serialize_json(...)
@@ -1,6 +1,6 @@
 import typing
 
-import pydantic
+from . import _codec_registry
 
 __all__ = [
     "dump",
@@ -11,6 +11,5 @@ def dump(v: typing.Any) -> bytes:
     if isinstance(v, bytes):
         return v
 
-    codec = pydantic.RootModel(v)
-    json_string = codec.model_dump_json()
-    return json_string.encode()
+    codec = _codec_registry.codecs.dumper(type(v))
+    return codec.dump_json(v)
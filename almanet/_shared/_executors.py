@@ -0,0 +1,71 @@
+import concurrent.futures
+import typing
+
+__all__ = [
+    "executor_kind",
+    "configure_executors",
+    "get_executor",
+    "shutdown_executors",
+]
+
+# "loop" runs on the event loop, "thread" and "process" in the shared pools of the process
+type executor_kind = typing.Literal["loop", "thread", "process"] | concurrent.futures.Executor
+
+_max_workers: dict[str, int | None] = {"thread": None, "process": None}
+
+_pools: dict[str, concurrent.futures.Executor] = {}
+
+
+def configure_executors(
+    thread_workers: int | None = None,
+    process_workers: int | None = None,
+) -> None:
+    """
+    Sets sizes of the shared pools, already created pools are replaced.
+
+    Args:
+    - thread_workers: size of the thread pool, `concurrent.futures` default if None.
+    - process_workers: size of the process pool, number of CPUs if None.
+    """
+    for kind, size in (("thread", thread_workers), ("process", process_workers)):
+        if size is not None and size < 1:
+            raise ValueError(f"{kind}_workers must be positive")
+        _max_workers[kind] = size
+        pool = _pools.pop(kind, None)
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+def get_executor(
+    kind: executor_kind,
+) -> concurrent.futures.Executor | None:
+    """
+    Returns the executor of the kind, creating the shared pool on first use, or None for "loop".
+    """
+    if isinstance(kind, concurrent.futures.Executor):
+        return kind
+
+    if kind == "loop":
+        return None
+
+    pool = _pools.get(kind)
+    if pool is None:
+        if kind == "thread":
+            pool = concurrent.futures.ThreadPoolExecutor(_max_workers["thread"], thread_name_prefix="almanet")
+        elif kind == "process":
+            pool = concurrent.futures.ProcessPoolExecutor(_max_workers["process"])
+        else:
+            raise ValueError(f"unknown executor {kind!r}")
+        _pools[kind] = pool
+    return pool
+
+
+def shutdown_executors(
+    wait: bool = True,
+) -> None:
+    """
+    Shuts down the shared pools, they are created again on next use.
+    """
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.shutdown(wait=wait)
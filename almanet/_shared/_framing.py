@@ -0,0 +1,85 @@
+import math
+import struct
+import typing
+from dataclasses import dataclass
+
+__all__ = [
+    "frame_model",
+    "is_framed",
+    "pack_frame",
+    "unpack_frame",
+]
+
+_MAGIC = b"AL"
+_VERSION = 1
+
+# magic, version, kind, flags, number of fields, deadline (NaN if not specified)
+_header = struct.Struct("!2sBBBBd")
+_field_length = struct.Struct("!H")
+
+
+@dataclass(slots=True)
+class frame_model:
+    """
+    Represents a framed envelope: a small binary header followed by raw payload bytes.
+    """
+
+    kind: int
+    flags: int
+    deadline: float | None
+    fields: list[str]
+    payload: memoryview
+
+
+def is_framed(data: bytes) -> bool:
+    return data[:2] == _MAGIC
+
+
+def pack_frame(
+    kind: int,
+    flags: int,
+    deadline: float | None,
+    fields: typing.Sequence[str],
+    payload: bytes | memoryview,
+) -> bytes:
+    """
+    Returns the frame, the payload is copied once into the message body and never escaped.
+    """
+    parts: list[bytes | memoryview] = [
+        _header.pack(_MAGIC, _VERSION, kind, flags, len(fields), math.nan if deadline is None else deadline)
+    ]
+    for field in fields:
+        encoded_field = field.encode()
+        parts.append(_field_length.pack(len(encoded_field)))
+        parts.append(encoded_field)
+    parts.append(payload)
+    return b"".join(parts)
+
+
+def unpack_frame(data: bytes) -> frame_model:
+    """
+    Parses the header, the payload is a `memoryview` slice of data without copy.
+
+    Raises:
+    - ValueError: if data is not a frame of supported version.
+    """
+    view = memoryview(data)
+    magic, version, kind, flags, fields_count, deadline = _header.unpack_from(view, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"unsupported frame {magic=} {version=}")
+
+    offset = _header.size
+    fields = []
+    for _ in range(fields_count):
+        (length,) = _field_length.unpack_from(view, offset)
+        offset += _field_length.size
+        fields.append(str(view[offset : offset + length], "utf-8"))
+        offset += length
+
+    return frame_model(
+        kind=kind,
+        flags=flags,
+        deadline=None if math.isnan(deadline) else deadline,
+        fields=fields,
+        payload=view[offset:],
+    )
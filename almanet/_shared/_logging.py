@@ -0,0 +1,47 @@
+import zlib
+
+__all__ = [
+    "PAYLOAD_LOG_LIMIT",
+    "truncate_payload",
+    "log_sampler",
+]
+
+# bytes of payload shown in log records
+PAYLOAD_LOG_LIMIT = 64
+
+
+def truncate_payload(
+    payload: bytes | memoryview | str,
+    limit: int = PAYLOAD_LOG_LIMIT,
+) -> str:
+    """
+    Returns repr of the payload head, with the total size if it was truncated.
+    """
+    size = len(payload)
+    head = payload[:limit]
+    if isinstance(head, memoryview):
+        head = head.tobytes()
+    if size <= limit:
+        return repr(head)
+    return f"{head!r}... ({size} bytes)"
+
+
+class log_sampler:
+    """
+    Selects 1 in `every` invocations for debug logging.
+    The choice depends on the invocation id only, so the caller and the callee log the same invocations.
+    """
+
+    def __init__(
+        self,
+        every: int = 1,
+    ) -> None:
+        if every < 1:
+            raise ValueError("every must be positive")
+        self.every = every
+
+    def sampled(
+        self,
+        key: str,
+    ) -> bool:
+        return self.every == 1 or zlib.crc32(key.encode()) % self.every == 0
@@ -0,0 +1,320 @@
+import asyncio
+import bisect
+import math
+import threading
+import typing
+
+__all__ = [
+    "DEFAULT_BUCKETS",
+    "counter",
+    "gauge",
+    "histogram",
+    "metrics_registry",
+]
+
+# seconds, from 0.5 ms to 1 min
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+type _labels_key = tuple[tuple[str, str], ...]
+
+
+def _make_key(labels: dict[str, typing.Any]) -> _labels_key:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(
+    key: _labels_key,
+    *extra: tuple[str, str],
+) -> str:
+    pairs = [*key, *extra]
+    if len(pairs) == 0:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _metric:
+    kind: typing.ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        function: typing.Callable[[], float] | None = None,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self._function = function
+        self._values: dict[_labels_key, float] = {}
+
+    def value(
+        self,
+        **labels,
+    ) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(_make_key(labels), 0)
+
+    def _samples(self) -> dict[_labels_key, float]:
+        if self._function is not None:
+            return {(): self._function()}
+        return dict(self._values)
+
+    def snapshot(self) -> list[dict[str, typing.Any]]:
+        return [{"labels": dict(key), "value": v} for key, v in self._samples().items()]
+
+    def render(self) -> typing.Iterable[str]:
+        for key, v in self._samples().items():
+            yield f"{self.name}{_format_labels(key)} {_format_value(v)}"
+
+
+class counter(_metric):
+    """
+    Monotonically increasing value.
+    The value is read from `function` if specified.
+    """
+
+    kind = "counter"
+
+    def inc(
+        self,
+        amount: float = 1,
+        **labels,
+    ) -> None:
+        key = _make_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class gauge(_metric):
+    """
+    Value that can go up and down.
+    The value is read from `function` if specified.
+    """
+
+    kind = "gauge"
+
+    def set(
+        self,
+        v: float,
+        **labels,
+    ) -> None:
+        self._values[_make_key(labels)] = v
+
+    def inc(
+        self,
+        amount: float = 1,
+        **labels,
+    ) -> None:
+        key = _make_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(
+        self,
+        amount: float = 1,
+        **labels,
+    ) -> None:
+        self.inc(-amount, **labels)
+
+
+class _histogram_state:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(
+        self,
+        size: int,
+    ) -> None:
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class histogram(_metric):
+    """
+    Distribution of observed values in cumulative buckets.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(float(i) for i in buckets))
+        self._states: dict[_labels_key, _histogram_state] = {}
+
+    def observe(
+        self,
+        v: float,
+        **labels,
+    ) -> None:
+        key = _make_key(labels)
+        state = self._states.get(key)
+        if state is None:
+            state = _histogram_state(len(self.buckets))
+            self._states[key] = state
+        i = bisect.bisect_left(self.buckets, v)
+        if i < len(self.buckets):
+            state.buckets[i] += 1
+        state.count += 1
+        state.sum += v
+
+    def value(
+        self,
+        **labels,
+    ) -> float:
+        """
+        Returns the number of observations.
+        """
+        state = self._states.get(_make_key(labels))
+        return 0 if state is None else state.count
+
+    def snapshot(self) -> list[dict[str, typing.Any]]:
+        samples = []
+        for key, state in list(self._states.items()):
+            samples.append(
+                {
+                    "labels": dict(key),
+                    "count": state.count,
+                    "sum": state.sum,
+                    "buckets": dict(zip(self.buckets, self._cumulative(state))),
+                }
+            )
+        return samples
+
+    def _cumulative(
+        self,
+        state: _histogram_state,
+    ) -> list[int]:
+        total = 0
+        cumulative = []
+        for count in state.buckets:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def render(self) -> typing.Iterable[str]:
+        for key, state in list(self._states.items()):
+            for bound, count in zip(self.buckets, self._cumulative(state)):
+                yield f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {count}"
+            yield f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {state.count}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(state.sum)}"
+            yield f"{self.name}_count{_format_labels(key)} {state.count}"
+
+
+class metrics_registry:
+    """
+    Collection of metrics, readable as a snapshot or in Prometheus text format.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create[T: _metric](
+        self,
+        kind: type[T],
+        name: str,
+        *args,
+        **kwargs,
+    ) -> T:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = kind(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, kind):
+                raise ValueError(f"metric {name} is already registered as {metric.kind}")
+            return metric
+
+    def counter(
+        self,
+        name: str,
+        description: str = "",
+        function: typing.Callable[[], float] | None = None,
+    ) -> counter:
+        return self._get_or_create(counter, name, description, function)
+
+    def gauge(
+        self,
+        name: str,
+        description: str = "",
+        function: typing.Callable[[], float] | None = None,
+    ) -> gauge:
+        return self._get_or_create(gauge, name, description, function)
+
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> histogram:
+        return self._get_or_create(histogram, name, description, buckets)
+
+    def get(
+        self,
+        name: str,
+    ) -> _metric | None:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> dict[str, dict[str, typing.Any]]:
+        """
+        Returns current values of all metrics.
+        """
+        return {
+            name: {"kind": metric.kind, "description": metric.description, "samples": metric.snapshot()}
+            for name, metric in list(self._metrics.items())
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        Returns all metrics in Prometheus text exposition format.
+        """
+        lines = []
+        for name, metric in list(self._metrics.items()):
+            if metric.description:
+                lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        lines.append("")
+        return "\n".join(lines)
+
+    async def serve(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+    ) -> asyncio.Server:
+        """
+        Starts a minimal HTTP server that responds to any request with Prometheus text exposition.
+        Returns the server, close it to stop.
+        """
+
+        async def handle(
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+        ) -> None:
+            try:
+                # the request is not routed, read it until the end of headers
+                await reader.readuntil(b"\r\n\r\n")
+                body = self.to_prometheus().encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                    b"Connection: close\r\n\r\n" + body
+                )
+                await writer.drain()
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
@@ -1,8 +1,7 @@
 from dataclasses import dataclass
 import typing
 
-import pydantic
-
+from . import _codec_registry
 from . import _decoding
 
 __all__ = [
@@ -33,7 +32,7 @@ def generate_json_schema(annotation):
     if annotation is ...:
         return None
 
-    model = pydantic.TypeAdapter(annotation)
+    model = _codec_registry.codecs.adapter(annotation)
     return model.json_schema()
 
 
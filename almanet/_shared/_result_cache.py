@@ -0,0 +1,83 @@
+import collections
+import time
+import typing
+
+__all__ = ["result_cache"]
+
+
+class result_cache:
+    """
+    Keeps results by key for `ttl` seconds.
+    Results are evicted in least recently used order once there are more than `maxsize` of them.
+
+    Args:
+    - maxsize: maximum number of cached results.
+    - ttl: seconds a result stays valid.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 60,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # incremented by `clear`, results of calls started before are not stored
+        self.generation = 0
+        self._results = collections.OrderedDict[bytes, tuple[float, typing.Any]]()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(
+        self,
+        key: bytes,
+    ) -> tuple[bool, typing.Any]:
+        """
+        Returns True and the result, or False and None if the key is missing or expired.
+        """
+        entry = self._results.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._results[key]
+            self.misses += 1
+            return False, None
+
+        self._results.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def set(
+        self,
+        key: bytes,
+        value: typing.Any,
+        generation: int | None = None,
+    ) -> int:
+        """
+        Stores the result unless the cache was cleared after `generation`.
+        Returns the number of evicted results.
+        """
+        if generation is not None and generation != self.generation:
+            return 0
+
+        self._results[key] = (time.monotonic() + self.ttl, value)
+        self._results.move_to_end(key)
+        evicted = 0
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def clear(self) -> None:
+        self._results.clear()
+        self.generation += 1
@@ -1,7 +1,7 @@
 import asyncio
 import typing
 
-__all__ = ["merge_streams", "make_closable"]
+__all__ = ["merge_streams", "closable_stream", "make_closable"]
 
 
 class close_stream(StopAsyncIteration):
@@ -41,26 +41,93 @@ async def merge_streams(*streams):
         task.cancel()
 
 
+class closable_stream[T, R]:
+    """
+    Asynchronous stream that can be closed while the consumer waits for the next value.
+    Values are passed through without creating tasks, closing cancels the waiting consumer instead.
+
+    Args:
+    - stream: is an asynchronous stream that you want to make closable.
+    - on_close: is a callable that takes no arguments and may return an awaitable, called once on close.
+    - transform: is applied to each value of the stream.
+    """
+
+    __slots__ = ("_iterator", "_on_close", "_transform", "_closed", "_waiter", "_close_task")
+
+    def __init__(
+        self,
+        stream: typing.AsyncIterable[T],
+        on_close: typing.Callable | None = None,
+        transform: typing.Callable[[T], R] | None = None,
+    ) -> None:
+        self._iterator = aiter(stream)
+        self._on_close = on_close
+        self._transform = transform
+        self._closed = False
+        self._waiter: asyncio.Task | None = None
+        self._close_task: asyncio.Task | None = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __aiter__(self) -> "closable_stream[T, R]":
+        return self
+
+    async def __anext__(self) -> R:
+        if self._closed:
+            raise StopAsyncIteration
+
+        waiter = asyncio.current_task()
+        self._waiter = waiter
+        try:
+            value = await anext(self._iterator)
+        except asyncio.CancelledError:
+            # cancelled by `close`, unless somebody else cancelled the consumer too
+            if self._closed and waiter is not None and waiter.uncancel() == 0:
+                raise StopAsyncIteration
+            raise
+        finally:
+            self._waiter = None
+
+        if self._transform is None:
+            return value  # type: ignore
+        return self._transform(value)
+
+    def _cancel_waiter(self) -> None:
+        if self._waiter is not None:
+            self._waiter.cancel()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._waiter is asyncio.current_task():
+            # closed by the stream itself, cancel the consumer once the stream waits
+            asyncio.get_running_loop().call_soon(self._cancel_waiter)
+        else:
+            self._cancel_waiter()
+
+        if callable(self._on_close):
+            result = self._on_close()
+            if asyncio.iscoroutine(result):
+                # keep a reference, so the task is not garbage collected
+                self._close_task = asyncio.ensure_future(result)
+
+
 def make_closable[T](
     stream: typing.AsyncIterable[T],
     on_close: typing.Callable | None = None,
-) -> typing.Tuple[typing.AsyncIterable[T], typing.Callable[[], None]]:
+    transform: typing.Callable[[T], typing.Any] | None = None,
+) -> typing.Tuple[typing.AsyncIterable, typing.Callable[[], None]]:
     """
     Makes an asynchronous stream closable.
 
     Args:
     - stream: is an asynchronous stream that you want to make closable.
     - on_close: is a callable that takes no arguments and returns an awaitable that completes when the stream is closed.
+    - transform: is applied to each value of the stream.
     """
-    close_event = asyncio.Event()
-
-    async def on_close_stream():
-        await close_event.wait()
-        if callable(on_close):
-            result = on_close()
-            if asyncio.iscoroutine(result):
-                await result
-        yield close_stream()
-
-    new_stream = merge_streams(stream, on_close_stream())
-    return new_stream, close_event.set
+    new_stream = closable_stream(stream, on_close, transform)
+    return new_stream, new_stream.close
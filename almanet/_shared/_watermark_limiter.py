@@ -0,0 +1,62 @@
+import asyncio
+
+__all__ = ["watermark_limiter"]
+
+
+class watermark_limiter:
+    """
+    Counts pending items and pauses producers between high and low water marks:
+    once depth reaches `high_water`, producers wait until it drops to `low_water`.
+
+    Args:
+    - high_water: maximum depth, unlimited if None.
+    - low_water: depth to resume at, half of `high_water` by default.
+    """
+
+    def __init__(
+        self,
+        high_water: int | None = None,
+        low_water: int | None = None,
+    ) -> None:
+        if high_water is not None and high_water < 1:
+            raise ValueError("high_water must be positive")
+
+        if low_water is None:
+            low_water = 0 if high_water is None else high_water // 2
+
+        if high_water is not None and not 0 <= low_water < high_water:
+            raise ValueError("low_water must be non-negative and less than high_water")
+
+        self.high_water = high_water
+        self.low_water = low_water
+        self.depth = 0
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._writable.is_set()
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a slot without waiting.
+        Returns False if producers are paused.
+        """
+        if self.paused:
+            return False
+        self.depth += 1
+        if self.high_water is not None and self.depth >= self.high_water:
+            self._writable.clear()
+        return True
+
+    async def acquire(self) -> None:
+        """
+        Takes a slot, waits while producers are paused.
+        """
+        while not self.try_acquire():
+            await self._writable.wait()
+
+    def release(self) -> None:
+        self.depth -= 1
+        if self.paused and self.depth <= self.low_water:
+            self._writable.set()
@@ -0,0 +1,168 @@
+import types
+import typing
+
+import pydantic_core
+
+from . import _codec_registry
+from . import _decoding
+from . import _encoding
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+__all__ = [
+    "JSON_CONTENT_TYPE",
+    "MSGPACK_CONTENT_TYPE",
+    "wire_codec",
+    "json_codec",
+    "msgpack_codec",
+    "register_wire_codec",
+    "get_wire_codec",
+    "detect_wire_codec",
+]
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+
+class wire_codec(typing.Protocol):
+    """
+    Interface for a wire format of envelopes and payloads.
+    `bytes` values are considered already encoded and are never encoded again.
+    """
+
+    content_type: str
+
+    def encode(
+        self,
+        v: typing.Any,
+    ) -> bytes:
+        raise NotImplementedError()
+
+    def decode(
+        self,
+        data: bytes,
+        annotation: typing.Any = ...,
+    ) -> typing.Any:
+        """
+        Decodes and validates data, returns plain data if annotation is not specified.
+        """
+        raise NotImplementedError()
+
+    def detect(
+        self,
+        data: bytes,
+    ) -> bool:
+        """
+        Returns True if the envelope is encoded by this codec.
+        """
+        raise NotImplementedError()
+
+
+class _json_codec:
+    content_type = JSON_CONTENT_TYPE
+
+    def encode(
+        self,
+        v: typing.Any,
+    ) -> bytes:
+        return _encoding.dump(v)
+
+    def decode(
+        self,
+        data: bytes,
+        annotation: typing.Any = ...,
+    ) -> typing.Any:
+        if isinstance(data, memoryview):
+            # pydantic parses contiguous bytes only
+            data = data.tobytes()
+        return _decoding.serialize_json(annotation)(data)
+
+    def detect(
+        self,
+        data: bytes,
+    ) -> bool:
+        return data[:1] == b"{"
+
+
+class _msgpack_codec:
+    """
+    Binary codec, `bytes` fields are stored as is instead of being escaped.
+    Requires `msgpack` package.
+    """
+
+    content_type = MSGPACK_CONTENT_TYPE
+
+    def require(self) -> types.ModuleType:
+        """
+        Returns `msgpack` module.
+
+        Raises:
+        - RuntimeError: if msgpack is not installed.
+        """
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed, run `pip install almanet[msgpack]`")
+        return msgpack
+
+    def encode(
+        self,
+        v: typing.Any,
+    ) -> bytes:
+        if isinstance(v, bytes):
+            return v
+
+        packer = self.require()
+        codec = _codec_registry.codecs.dumper(type(v))
+        # values unknown to msgpack (datetime, UUID, set, ...) are converted like in JSON
+        return packer.packb(codec.dump_python(v), default=pydantic_core.to_jsonable_python)
+
+    def decode(
+        self,
+        data: bytes,
+        annotation: typing.Any = ...,
+    ) -> typing.Any:
+        v = self.require().unpackb(data)
+        if annotation is ...:
+            return v
+        return _decoding.serialize(annotation)(v)
+
+    def detect(
+        self,
+        data: bytes,
+    ) -> bool:
+        # envelopes are maps: fixmap, map 16 or map 32
+        first_byte = data[0] if len(data) > 0 else -1
+        return msgpack is not None and (0x80 <= first_byte <= 0x8F or first_byte in (0xDE, 0xDF))
+
+
+json_codec = _json_codec()
+msgpack_codec = _msgpack_codec()
+
+_registry: dict[str, wire_codec] = {}
+
+
+def register_wire_codec(codec: wire_codec) -> None:
+    _registry[codec.content_type] = codec
+
+
+def get_wire_codec(content_type: str) -> wire_codec:
+    codec = _registry.get(content_type)
+    if codec is None:
+        raise ValueError(f"unknown content type {content_type}")
+    return codec
+
+
+def detect_wire_codec(data: bytes) -> wire_codec:
+    """
+    Returns the codec of the envelope.
+    """
+    for codec in _registry.values():
+        if codec.detect(data):
+            return codec
+    raise ValueError("unknown wire format")
+
+
+register_wire_codec(json_codec)
+register_wire_codec(msgpack_codec)
@@ -0,0 +1,45 @@
+"""
+Runs almanet benchmarks against the in-process broker.
+
+Usage:
+    python -m benchmarks [-n OPERATIONS] [NAME_FILTER ...]
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+import pathlib
+
+from benchmarks import _harness
+
+
+def _import_benchmarks() -> None:
+    for path in sorted(pathlib.Path(__file__).parent.glob("bench_*.py")):
+        importlib.import_module(f"benchmarks.{path.stem}")
+
+
+async def main(
+    n: int,
+    filters: list[str],
+) -> None:
+    for name, function in _harness.registry.items():
+        if filters and not any(f in name for f in filters):
+            continue
+        results = await function(n)
+        if not isinstance(results, list):
+            results = [results]
+        for r in results:
+            print(r)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-n", type=int, default=2000, help="number of operations per benchmark")
+    parser.add_argument("filters", nargs="*", help="run only benchmarks which name contains any of filters")
+    args = parser.parse_args()
+
+    logging.getLogger("almanet").setLevel(logging.ERROR)
+
+    _import_benchmarks()
+    asyncio.run(main(args.n, args.filters))
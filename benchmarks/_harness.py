@@ -0,0 +1,105 @@
+import asyncio
+import time
+import typing
+
+from almanet import _shared
+
+__all__ = [
+    "result_model",
+    "benchmark",
+    "registry",
+    "measure",
+    "percentile",
+]
+
+
+def percentile(
+    values: typing.Sequence[float],
+    q: float,
+) -> float:
+    """
+    Returns the q-th percentile (0 <= q <= 100) of values using nearest-rank method.
+    """
+    if len(values) == 0:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+@_shared.dataclass(slots=True)
+class result_model:
+    """
+    Represents a result of a benchmark.
+    """
+
+    name: str
+    operations: int
+    duration: float
+    latencies: list[float] = _shared.field(default_factory=list)
+    extra: dict[str, typing.Any] = _shared.field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        if self.duration == 0:
+            return 0.0
+        return self.operations / self.duration
+
+    @property
+    def p50(self) -> float:
+        return percentile(self.latencies, 50)
+
+    @property
+    def p99(self) -> float:
+        return percentile(self.latencies, 99)
+
+    def __str__(self) -> str:
+        line = (
+            f"{self.name:<40} {self.operations:>8} ops "
+            f"{self.throughput:>12.1f} ops/s "
+            f"p50 {self.p50 * 1000:>9.3f} ms "
+            f"p99 {self.p99 * 1000:>9.3f} ms"
+        )
+        for k, v in self.extra.items():
+            line += f" {k}={v}"
+        return line
+
+
+type _benchmark_function = typing.Callable[[int], typing.Awaitable[result_model | list[result_model]]]
+
+registry: dict[str, _benchmark_function] = {}
+
+
+def benchmark[T: _benchmark_function](function: T) -> T:
+    """
+    Registers a benchmark.
+    A benchmark is an async function that takes the number of operations and returns results.
+    """
+    registry[f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"] = function
+    return function
+
+
+async def measure(
+    name: str,
+    operation: typing.Callable[[], typing.Awaitable[typing.Any]],
+    n: int,
+    concurrency: int = 1,
+) -> result_model:
+    """
+    Runs the operation n times by `concurrency` workers and records the latency of each run.
+    """
+    latencies: list[float] = []
+    remaining = n
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            begin_time = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - begin_time)
+
+    begin_time = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(min(concurrency, n))])
+    duration = time.perf_counter() - begin_time
+    return result_model(name, n, duration, latencies)
@@ -0,0 +1,53 @@
+import asyncio
+import os
+import time
+
+import almanet
+from benchmarks._harness import benchmark, result_model
+
+# acknowledgements are batched by the nsqd TCP client, the in-process broker has nothing to batch
+NSQD_TCP_ADDRESS = os.environ.get("NSQD_TCP_ADDRESS", "localhost:4150")
+
+
+async def _consume(
+    ack_window: float | None,
+    n: int,
+) -> result_model:
+    topic = f"net.benchmarks.acks.{almanet.shared.new_id()}#ephemeral"
+    session = almanet.clients.make_ansqd_tcp_session(NSQD_TCP_ADDRESS, ack_window=ack_window)
+    async with session:
+        await session._client.produce_many(topic, [b"test"] * n)
+        messages_stream, stop_consumer = await session.consume(topic, "main#ephemeral", max_in_flight=256)
+        consumed = asyncio.Event()
+        count = 0
+
+        async def commit(message):
+            nonlocal count
+            await message.commit()
+            count += 1
+            if count == n:
+                consumed.set()
+
+        begin_time = time.perf_counter()
+
+        async def consume():
+            async for message in messages_stream:
+                session._background_tasks.schedule(commit(message))
+
+        session._background_tasks.schedule(consume(), daemon=True)
+        await consumed.wait()
+        result = result_model(f"consume ack_window={ack_window}", n, time.perf_counter() - begin_time)
+        stop_consumer()
+        return result
+
+
+@benchmark
+async def acknowledgements(n: int) -> list[result_model]:
+    try:
+        _, writer = await asyncio.open_connection(*NSQD_TCP_ADDRESS.split(":"))
+        writer.close()
+    except OSError:
+        print(f"acks: nsqd is not available at {NSQD_TCP_ADDRESS}, skipped")
+        return []
+
+    return [await _consume(ack_window, n) for ack_window in (None, 0.001)]
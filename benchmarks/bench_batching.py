@@ -0,0 +1,22 @@
+import almanet
+from benchmarks._harness import benchmark, measure, result_model
+
+# emulates a round trip to nsqd, so the number of round trips shows up in throughput
+LATENCY = 0.0005
+
+
+@benchmark
+async def produce_batching(n: int) -> list[result_model]:
+    results = []
+    for batch_window in (None, 0, 0.001):
+        session = almanet.clients.make_local_session(latency=LATENCY, batch_window=batch_window)
+        async with session:
+            result = await measure(
+                f"produce batch_window={batch_window}",
+                lambda: session.produce("net.benchmarks.batching", "test"),
+                n,
+                concurrency=256,
+            )
+            result.extra["latency"] = LATENCY
+            results.append(result)
+    return results
@@ -0,0 +1,53 @@
+import time
+import tracemalloc
+
+from almanet import _session
+from almanet import _shared
+from benchmarks._harness import benchmark, result_model
+
+
+def _round_trip(
+    invocation: _session.invoke_event_model,
+    framed: bool,
+) -> None:
+    message_body = _session._dump_envelope(invocation, _shared.json_codec, framed)
+    decoded, _ = _session._load_envelope(message_body, _session.invoke_event_model)
+    assert len(decoded.payload) == len(invocation.payload)
+
+
+def _measure(
+    name: str,
+    invocation: _session.invoke_event_model,
+    framed: bool,
+    n: int,
+) -> result_model:
+    # warm up codec caches, so only the round trip allocations are traced
+    _round_trip(invocation, framed)
+    tracemalloc.start()
+    _round_trip(invocation, framed)
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    begin_time = time.perf_counter()
+    for _ in range(n):
+        _round_trip(invocation, framed)
+    result = result_model(name, n, time.perf_counter() - begin_time)
+    result.extra["peak_alloc"] = peak_alloc
+    return result
+
+
+@benchmark
+async def envelope(n: int) -> list[result_model]:
+    results = []
+    for label, size in (("1KB", 1024), ("1MB", 1024 * 1024)):
+        invocation = _session.invoke_event_model(
+            id="test",
+            caller_id="test",
+            payload=b"x" * size,
+            reply_topic="test",
+            deadline=time.time() + 60,
+        )
+        count = n if size < 1024 * 1024 else max(5, n // 100)
+        results.append(_measure(f"envelope json {label}", invocation, False, count))
+        results.append(_measure(f"envelope framed {label}", invocation, True, count))
+    return results
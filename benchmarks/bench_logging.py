@@ -0,0 +1,46 @@
+import logging
+
+import almanet
+from benchmarks._harness import benchmark, measure, result_model
+
+ECHO_URI = "net.benchmarks.logging.echo"
+
+# large enough to show the cost of payload reprs
+PAYLOAD = "x" * 4096
+
+
+async def echo(
+    payload: bytes,
+    **kwargs,
+) -> bytes:
+    return payload
+
+
+@benchmark
+async def call_logging(n: int) -> list[result_model]:
+    logger = logging.getLogger("almanet")
+    initial_level, initial_propagate = logger.level, logger.propagate
+    # records are created and formatted up to the handler, but not written anywhere
+    logger.propagate = False
+    handler = logging.NullHandler()
+    logger.addHandler(handler)
+
+    results = []
+    try:
+        for label, level, sample_every in (
+            ("disabled", logging.WARNING, 1),
+            ("debug sampled 1/100", logging.DEBUG, 100),
+            ("debug", logging.DEBUG, 1),
+        ):
+            logger.setLevel(level)
+            session = almanet.Almanet(almanet.clients.local_client(), log_sample_every=sample_every)
+            async with session:
+                session.register(ECHO_URI, echo)
+                result = await measure(f"call logging {label}", lambda: session.call(ECHO_URI, PAYLOAD), n)
+                result.extra["us_per_call"] = round(result.duration / result.operations * 1e6, 1)
+                results.append(result)
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(initial_level)
+        logger.propagate = initial_propagate
+    return results
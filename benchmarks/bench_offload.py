@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import almanet
+from benchmarks._harness import benchmark, measure, percentile, result_model
+
+offload_service = almanet.remote_service("net.benchmarks.offload")
+
+# about 1.3 MB of JSON
+ITEMS = list(range(200_000))
+
+
+@offload_service.procedure(offload_threshold=None)
+async def large_inline(
+    payload: int,
+    **kwargs,
+) -> list[int]:
+    return ITEMS
+
+
+@offload_service.procedure
+async def large_offloaded(
+    payload: int,
+    **kwargs,
+) -> list[int]:
+    return ITEMS
+
+
+async def _watch_loop(
+    stalls: list[float],
+    interval: float = 0.001,
+) -> None:
+    while True:
+        begin_time = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - begin_time - interval)
+
+
+@benchmark
+async def large_reply(n: int) -> list[result_model]:
+    n = max(1, n // 100)
+    results = []
+    # framed envelopes keep the large payload out of the envelope codec
+    session = almanet.Almanet(almanet.clients.local_client(), framed_envelopes=True)
+    async with session:
+        await offload_service._post_join_event.notify(session)
+        for procedure in (large_inline, large_offloaded):
+            stalls: list[float] = []
+            watcher = asyncio.create_task(_watch_loop(stalls))
+            result = await measure(
+                f"large reply {procedure.name}",
+                lambda: procedure(0, force_local=False),
+                n,
+                concurrency=4,
+            )
+            watcher.cancel()
+            result.extra["p99_loop_stall_ms"] = round(percentile(stalls, 99) * 1000, 1)
+            saved = session.metrics.get("almanet_codec_offloaded_seconds_total")
+            result.extra["loop_saved_s"] = round(
+                sum(saved.value(uri=procedure.uri, operation=i) for i in ("decode", "encode")),  # type: ignore
+                3,
+            )
+            results.append(result)
+    return results
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import almanet
+from benchmarks._harness import benchmark, result_model
+
+IN_FLIGHT = 100_000
+
+
+async def echo(
+    payload: bytes,
+    **kwargs,
+) -> bytes:
+    return payload
+
+
+async def _in_flight_calls(
+    name: str,
+    session: almanet.Almanet,
+    uri: str,
+    timeout: float,
+) -> result_model:
+    begin_time = time.perf_counter()
+    calls = [session.call(uri, "test", timeout=timeout) for _ in range(IN_FLIGHT)]  # type: ignore
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    result = result_model(name, IN_FLIGHT, time.perf_counter() - begin_time)
+    result.extra["failed"] = sum(isinstance(i, Exception) for i in results)
+    return result
+
+
+@benchmark
+async def pending_replies(n: int) -> list[result_model]:
+    # n is ignored, the point is the number of calls in flight at once
+    async with almanet.clients.make_local_session() as session:
+        session.register("net.benchmarks.echo", echo, max_in_flight=IN_FLIGHT)
+        return [
+            await _in_flight_calls(f"{IN_FLIGHT} in flight, expired", session, "net.benchmarks.nobody", 1),
+            await _in_flight_calls(f"{IN_FLIGHT} in flight, replied", session, "net.benchmarks.echo", 60),
+        ]
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import almanet
+from benchmarks._harness import benchmark, measure, result_model
+
+ECHO_URI = "net.benchmarks.echo"
+
+bench_service = almanet.remote_service("net.benchmarks.service")
+
+
+@bench_service.procedure
+async def greet(
+    payload: str,
+    session: almanet.Almanet,
+) -> str:
+    return f"Hello, {payload}!"
+
+
+async def echo(
+    payload: bytes,
+    **kwargs,
+) -> bytes:
+    return payload
+
+
+@benchmark
+async def call(n: int) -> list[result_model]:
+    async with almanet.clients.make_local_session() as session:
+        session.register(ECHO_URI, echo)
+        return [
+            await measure("call sequential", lambda: session.call(ECHO_URI, "test"), n),
+            await measure("call concurrent(64)", lambda: session.call(ECHO_URI, "test"), n, concurrency=64),
+        ]
+
+
+@benchmark
+async def call_many(n: int) -> list[result_model]:
+    # emulates a round trip to nsqd, so the number of published frames shows up in throughput
+    latency = 0.0005
+    async with almanet.clients.make_local_session(latency=latency) as session:
+        session.register(ECHO_URI, echo, concurrency=256)
+        payloads = ["test"] * n
+
+        begin_time = time.perf_counter()
+        await asyncio.gather(*[session.call(ECHO_URI, i) for i in payloads])
+        gathered = result_model("call gather", n, time.perf_counter() - begin_time)
+
+        begin_time = time.perf_counter()
+        await session.call_many(ECHO_URI, payloads)
+        bulk = result_model("call_many", n, time.perf_counter() - begin_time)
+
+        for result in (gathered, bulk):
+            result.extra["latency"] = latency
+        return [gathered, bulk]
+
+
+@benchmark
+async def multicall(n: int) -> list[result_model]:
+    peers = 4
+    timeout = 0.05
+    async with almanet.clients.make_local_session() as session:
+        for i in range(peers):
+            session.register(ECHO_URI, echo, channel=f"peer{i}")
+        until_timeout = await measure(
+            f"multicall peers={peers}",
+            lambda: session.multicall(ECHO_URI, "test", timeout=timeout),  # type: ignore
+            max(5, n // 100),
+        )
+        until_timeout.extra["timeout"] = timeout
+        until_expected = await measure(
+            f"multicall peers={peers} expected={peers}",
+            lambda: session.multicall(ECHO_URI, "test", expected=peers),
+            n,
+        )
+        return [until_timeout, until_expected]
+
+
+@benchmark
+async def produce(n: int) -> list[result_model]:
+    topic = "net.benchmarks.produced"
+    async with almanet.clients.make_local_session() as session:
+        messages_stream, stop_consumer = await session.consume(topic, "main")
+        consumed = asyncio.Event()
+
+        async def consume():
+            count = 0
+            async for message in messages_stream:
+                await message.commit()
+                count += 1
+                if count == n:
+                    consumed.set()
+
+        session._background_tasks.schedule(consume(), daemon=True)
+
+        begin_time = time.perf_counter()
+        result = await measure("produce", lambda: session.produce(topic, "test"), n)
+        await consumed.wait()
+        end_to_end = result_model("produce end-to-end", n, time.perf_counter() - begin_time)
+        stop_consumer()
+        return [result, end_to_end]
+
+
+@benchmark
+async def remote_procedure(n: int) -> list[result_model]:
+    async with almanet.clients.make_local_session() as session:
+        await bench_service._post_join_event.notify(session)
+        return [
+            await measure("remote procedure sequential", lambda: greet("test", force_local=False), n),
+            await measure(
+                "remote procedure concurrent(64)", lambda: greet("test", force_local=False), n, concurrency=64
+            ),
+        ]
@@ -0,0 +1,133 @@
+import asyncio
+import time
+import tracemalloc
+
+import almanet
+from almanet import _session
+from almanet import _shared
+from almanet._clients import _ansqd_tcp
+from almanet._shared import _streaming
+from benchmarks._harness import benchmark, result_model
+
+MAX_IN_FLIGHT = 64
+
+
+class _raw_message:
+    """
+    Mimics `ansq` message.
+    """
+
+    __slots__ = ("id", "timestamp", "body", "attempts")
+
+    def __init__(
+        self,
+        body: bytes,
+    ) -> None:
+        self.id = "test"
+        self.timestamp = time.time_ns()
+        self.body = body
+        self.attempts = 1
+
+    async def fin(self) -> None:
+        pass
+
+    async def req(self) -> None:
+        pass
+
+
+def _legacy_make_closable(stream, on_close, transform):
+    # stream pipeline before `closable_stream`: a conversion generator merged with a close stream
+    async def convert():
+        async for i in stream:
+            yield transform(i)
+
+    close_event = asyncio.Event()
+
+    async def on_close_stream():
+        await close_event.wait()
+        on_close()
+        yield _streaming.close_stream()
+
+    return _shared.merge_streams(convert(), on_close_stream()), close_event.set
+
+
+class _replay_client:
+    """
+    Delivers n prepared invocations to the consumer, then closes the stream.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        make_closable,
+    ) -> None:
+        self.n = n
+        self.make_closable = make_closable
+
+    async def consume(self, topic, channel, *, max_in_flight=None):
+        invocation = _session.invoke_event_model(id="test", caller_id="test", payload=b'"test"', reply_topic="")
+        body = _shared.dump(invocation)
+        close = None
+
+        async def messages():
+            for _ in range(self.n):
+                yield _raw_message(body)
+            close()  # type: ignore
+            await asyncio.Event().wait()
+
+        messages_stream, close = self.make_closable(
+            messages(), lambda: None, _ansqd_tcp.ansqd_tcp_client._convert_ansq_message
+        )
+        return messages_stream, close
+
+
+async def _consume(
+    n: int,
+    make_closable,
+    max_in_flight: int = MAX_IN_FLIGHT,
+) -> tuple[float, float]:
+    session = almanet.Almanet(_replay_client(n, make_closable))  # type: ignore
+    session.joined = True
+
+    async def procedure(payload, **kwargs):
+        return payload
+
+    registration = _session.registration_model(
+        "net.benchmarks.streaming", "main", procedure, session, max_in_flight=max_in_flight
+    )
+    loop = asyncio.get_running_loop()
+    created_tasks = 0
+
+    def count_tasks(loop, coroutine, **kwargs):
+        nonlocal created_tasks
+        created_tasks += 1
+        return asyncio.Task(coroutine, loop=loop, **kwargs)
+
+    loop.set_task_factory(count_tasks)
+    begin_time = time.perf_counter()
+    try:
+        await session._consume_invocations(registration)
+    finally:
+        loop.set_task_factory(None)
+    await session._background_tasks.complete()
+    return time.perf_counter() - begin_time, created_tasks / n
+
+
+@benchmark
+async def consume_invocations(n: int) -> list[result_model]:
+    results = []
+    for label, make_closable in (("merge_streams", _legacy_make_closable), ("closable_stream", _shared.make_closable)):
+        await _consume(min(n, 100), make_closable)  # warm up
+
+        # one invocation at a time, so the peak is the memory of the pipeline itself
+        tracemalloc.start()
+        await _consume(min(n, 1000), make_closable, max_in_flight=1)
+        _, peak_alloc = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        duration, tasks_per_message = await _consume(n, make_closable)
+        result = result_model(f"consume invocations {label}", n, duration)
+        result.extra["tasks_per_message"] = tasks_per_message
+        result.extra["peak_alloc"] = peak_alloc
+        results.append(result)
+    return results
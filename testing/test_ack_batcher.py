@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+import almanet
+
+
+class stub_writer:
+    def __init__(self) -> None:
+        self.writes: list[bytes] = []
+
+    def write(self, data: bytes) -> None:
+        self.writes.append(data)
+
+
+class stub_connection:
+    def __init__(
+        self,
+        in_flight: int = 0,
+    ) -> None:
+        self.is_connected = True
+        self._writer = stub_writer()
+        self._in_flight = in_flight
+
+
+class stub_message:
+    def __init__(
+        self,
+        id: str,
+        connection: stub_connection,
+    ) -> None:
+        self.id = id
+        self._connection = connection
+        self._is_processed = False
+        self.acknowledged_by_ansq: list[str] = []
+
+    @property
+    def can_be_processed(self) -> bool:
+        return not self._is_processed
+
+    async def fin(self) -> None:
+        self.acknowledged_by_ansq.append("FIN")
+
+    async def req(self, timeout: int) -> None:
+        self.acknowledged_by_ansq.append(f"REQ {timeout}")
+
+
+async def test_ack_batcher_joins_frames():
+    batcher = almanet.clients.ack_batcher(window=0.01)
+    connection = stub_connection(in_flight=3)
+    first = stub_message("a", connection)
+    second = stub_message("b", connection)
+
+    await asyncio.gather(
+        batcher.fin(first),  # type: ignore
+        batcher.req(second, 100),  # type: ignore
+    )
+    assert connection._writer.writes == [b"FIN a\nREQ b 100\n"]
+    # ansq only sends RDY on subscribe, nsqd frees the slots on FIN and REQ
+    assert connection._in_flight == 1
+    assert first._is_processed and second._is_processed
+
+    # a message is acknowledged once
+    with pytest.raises(RuntimeWarning):
+        await batcher.fin(first)  # type: ignore
+
+
+async def test_ack_batcher_max_batch_size():
+    batcher = almanet.clients.ack_batcher(window=60, max_batch_size=2)
+    connection = stub_connection(in_flight=2)
+
+    # the window is never waited for once the batch is full
+    async with asyncio.timeout(1):
+        await asyncio.gather(*[batcher.fin(stub_message(i, connection)) for i in "ab"])  # type: ignore
+    assert connection._writer.writes == [b"FIN a\nFIN b\n"]
+    assert connection._in_flight == 0
+
+
+async def test_ack_batcher_disconnected():
+    batcher = almanet.clients.ack_batcher(window=0.01)
+    connection = stub_connection(in_flight=2)
+    connection.is_connected = False
+    first = stub_message("a", connection)
+    second = stub_message("b", connection)
+
+    # ansq handles messages of a connection that reconnects or closes
+    await batcher.fin(first)  # type: ignore
+    await batcher.req(second, 100)  # type: ignore
+    assert first.acknowledged_by_ansq == ["FIN"]
+    assert second.acknowledged_by_ansq == ["REQ 100"]
+    assert connection._writer.writes == []
+
+
+async def test_ack_batcher_connection_closed():
+    batcher = almanet.clients.ack_batcher(window=0.01)
+    connection = stub_connection(in_flight=2)
+    acknowledgements = asyncio.gather(
+        *[batcher.fin(stub_message(i, connection)) for i in "ab"],  # type: ignore
+        return_exceptions=True,
+    )
+    await asyncio.sleep(0)
+
+    # the connection closes within the window
+    connection.is_connected = False
+    results = await acknowledgements
+    assert all(isinstance(i, ConnectionError) for i in results)
+    assert connection._writer.writes == []
+    assert connection._in_flight == 2
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import almanet
+
+batch_service = almanet.remote_service("net.testing.batch")
+
+batch_sizes = []
+
+
+class user_not_found(almanet.remote_exception):
+    payload: int
+
+
+@batch_service.procedure(batch_size=8, batch_window=0.05, exceptions={user_not_found})
+async def get_users(
+    payload: list[int],
+    **kwargs,
+) -> list[str]:
+    batch_sizes.append(len(payload))
+    return [user_not_found(i) if i < 0 else f"user {i}" for i in payload]  # type: ignore
+
+
+async def test_batch_procedure():
+    batch_sizes.clear()
+    async with almanet.clients.make_local_session() as session:
+        await batch_service._post_join_event.notify(session)
+
+        calls = [get_users(i, force_local=False) for i in range(10)]
+        assert await asyncio.gather(*calls) == [f"user {i}" for i in range(10)]
+        # a full batch and the rest after the window
+        assert batch_sizes == [8, 2]
+
+        # exceptions are replied to their invocations only
+        results = await asyncio.gather(
+            get_users(1, force_local=False),
+            get_users(-1, force_local=False),
+            return_exceptions=True,
+        )
+        assert results[0] == "user 1"
+        assert isinstance(results[1], user_not_found)
+
+        # invalid payloads do not reach the procedure
+        with pytest.raises(almanet.rpc_invalid_payload):
+            await get_users("x", force_local=False)  # type: ignore
+
+        # local calls pass a batch of one
+        assert await get_users(2) == "user 2"
+        with pytest.raises(user_not_found):
+            await get_users(-2)
+
+
+async def test_call_many_batch_procedure():
+    batch_sizes.clear()
+    async with almanet.clients.make_local_session() as session:
+        await batch_service._post_join_event.notify(session)
+
+        results = await get_users.call_many([1, -1, 2])
+        assert results[0] == "user 1"
+        assert isinstance(results[1], user_not_found)
+        assert results[2] == "user 2"
+        # invocations published together are executed in one batch
+        assert batch_sizes == [3]
+
+        indexes = [i async for i, _ in get_users.iter_call_many(range(4), concurrency=2)]
+        assert sorted(indexes) == [0, 1, 2, 3]
+
+
+async def test_batch_procedure_failure():
+    async def failing(invocations, **kwargs):
+        raise almanet.rpc_exception("database is down", name="unavailable")
+
+    async with almanet.clients.make_local_session() as session:
+        session.register("net.testing.batch.failing", failing, batch_size=4)
+        results = await asyncio.gather(
+            *[session.call("net.testing.batch.failing", i) for i in range(2)],
+            return_exceptions=True,
+        )
+        assert [getattr(i, "name", None) for i in results] == ["unavailable", "unavailable"]
@@ -0,0 +1,23 @@
+import almanet
+
+
+def test_adapter_is_compiled_once():
+    registry = almanet.shared.codec_registry()
+    assert registry.adapter(list[int]) is registry.adapter(list[int])
+    assert registry.hits == 1
+    assert registry.misses == 1
+
+
+def test_eviction():
+    registry = almanet.shared.codec_registry(maxsize=2)
+    for annotation in (int, str, bytes):
+        registry.adapter(annotation)
+    assert len(registry) == 2
+    assert registry.evictions == 1
+
+
+def test_dump():
+    payload = almanet.invoke_event_model(id="1", caller_id="2", payload=b"{}", reply_topic="")
+    serializer = almanet.shared.serialize_json(almanet.invoke_event_model)
+    assert serializer(almanet.shared.dump(payload)) == payload
+    assert almanet.shared.dump({"a": [1, None]}) == b'{"a":[1,null]}'
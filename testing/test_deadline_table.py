@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+import almanet
+
+
+async def test_deadline_table():
+    table = almanet.shared.deadline_table[int](resolution=0.05)
+    loop = asyncio.get_running_loop()
+    begin_time = loop.time()
+
+    expiring = [table.add(f"expiring{i}", 0.1) for i in range(1000)]
+    completed = table.add("completed", 0.1)
+    later = table.add("later", 0.3)
+    completed.set_result(1)
+    assert table.pop("completed") is completed
+
+    results = await asyncio.gather(*expiring, return_exceptions=True)
+    assert all(isinstance(i, TimeoutError) for i in results)
+    # never earlier than the timeout, at most one bucket later
+    assert 0.1 <= loop.time() - begin_time < 0.2
+    assert not later.done()
+
+    for i in range(1000):
+        table.pop(f"expiring{i}")
+    assert len(table) == 1
+
+    with pytest.raises(TimeoutError):
+        await later
+    table.pop("later")
+    assert len(table) == 0
+    assert table._timer is None
+
+
+async def test_call_timeout():
+    async with almanet.clients.make_local_session() as session:
+        calls = [session.call("net.example.nobody", i, timeout=0.1) for i in range(100)]  # type: ignore
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        assert all(isinstance(i, TimeoutError) for i in results)
+        assert len(session._pending_replies) == 0
+
+
+async def test_call_timeout_stalled_publish():
+    async def stalled(*args, **kwargs):
+        await asyncio.sleep(60)
+
+    async with almanet.clients.make_local_session() as session:
+        session._produce = stalled  # type: ignore
+        loop = asyncio.get_running_loop()
+        begin_time = loop.time()
+        with pytest.raises(TimeoutError):
+            await session.call("net.example.nobody", 1, timeout=0.1)  # type: ignore
+        # the publish is bounded by the timeout of the call
+        assert loop.time() - begin_time < 0.5
+        assert len(session._pending_replies) == 0
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+import almanet
+from almanet import _service
+
+executors_service = almanet.remote_service("net.testing.executors")
+
+
+class negative_payload(almanet.remote_exception):
+    payload: int
+
+
+@executors_service.procedure(executor="thread")
+def blocking_sleep(
+    payload: float,
+    **kwargs,
+) -> str:
+    time.sleep(payload)
+    return threading.current_thread().name
+
+
+@executors_service.procedure
+async def ping(
+    payload: str,
+    **kwargs,
+) -> str:
+    return payload
+
+
+@executors_service.procedure(executor="process", exceptions={negative_payload})
+async def process_id(
+    payload: int,
+    **kwargs,
+) -> int:
+    if payload < 0:
+        raise negative_payload(payload)
+    return os.getpid()
+
+
+@executors_service.procedure(offload_threshold=8)
+async def repeat(
+    payload: str,
+    **kwargs,
+) -> str:
+    return payload * 4
+
+
+async def test_codec_offload():
+    async with almanet.clients.make_local_session() as session:
+        await executors_service._post_join_event.notify(session)
+
+        assert await repeat("a", force_local=False) == "aaaa"
+        offloaded = session.metrics.get("almanet_codec_offloaded_total")
+        assert offloaded.value(uri=repeat.uri, operation="decode") == 0  # type: ignore
+
+        # the reply exceeded the threshold, it was encoded and decoded by the caller in the thread pool
+        assert await repeat("large", force_local=False) == "large" * 4
+        assert offloaded.value(uri=repeat.uri, operation="decode") == 1  # type: ignore
+        assert offloaded.value(uri=repeat.uri, operation="encode") == 1  # type: ignore
+
+        # each reply is estimated on its own, a small one after a large one stays on the loop
+        assert await repeat("b", force_local=False) == "bbbb"
+        assert offloaded.value(uri=repeat.uri, operation="decode") == 1  # type: ignore
+        assert offloaded.value(uri=repeat.uri, operation="encode") == 1  # type: ignore
+
+
+def test_estimated_size():
+    assert _service._estimated_size("a" * 100, 1000) > 100
+    assert _service._estimated_size({"key": ["a" * 100] * 10}, 10_000) > 1000
+    assert _service._estimated_size([None] * 2000, 1000) > 1000
+    # counting stops once the limit is exceeded
+    assert _service._estimated_size(list(range(1_000_000)), 1000) <= 1002
+    assert _service._estimated_size(1, 1000) < 1000
+
+
+async def test_thread_executor():
+    async with almanet.clients.make_local_session() as session:
+        await executors_service._post_join_event.notify(session)
+
+        sleeping = asyncio.ensure_future(blocking_sleep(0.3, force_local=False))
+        await asyncio.sleep(0.05)
+        # the loop keeps serving other invocations
+        begin_time = time.monotonic()
+        assert await ping("test", force_local=False) == "test"
+        assert time.monotonic() - begin_time < 0.2
+
+        thread_name = await sleeping
+        assert thread_name.startswith("almanet")
+
+        # local calls of sync procedures run in the executor too
+        assert (await blocking_sleep(0)).startswith("almanet")
+
+
+async def test_process_executor():
+    almanet.shared.configure_executors(process_workers=1)
+    try:
+        async with almanet.clients.make_local_session() as session:
+            await executors_service._post_join_event.notify(session)
+
+            assert await process_id(1, force_local=False) != os.getpid()
+
+            with pytest.raises(negative_payload) as e:
+                await process_id(-1, force_local=False)
+            assert e.value.payload == -1
+    finally:
+        almanet.shared.shutdown_executors()
+
+
+def test_executor_validation():
+    async def local_function(payload, **kwargs):
+        return payload
+
+    with pytest.raises(ValueError):
+        executors_service.add_procedure(local_function, executor="process")
+
+    with pytest.raises(ValueError):
+        executors_service.add_procedure(local_function, executor="gpu")  # type: ignore
@@ -0,0 +1,96 @@
+import asyncio
+
+import almanet
+
+
+async def _take(stream, n):
+    result = []
+    async for message in stream:
+        result.append(message)
+        if len(result) == n:
+            break
+    return result
+
+
+async def test_topic_channel_semantics():
+    client = almanet.clients.local_client()
+    a_stream, _ = await client.consume("topic", "a")
+    b_stream, _ = await client.consume("topic", "b")
+
+    await client.produce("topic", b"message", delay=0)
+
+    async with asyncio.timeout(1):
+        [a] = await _take(a_stream, 1)
+        [b] = await _take(b_stream, 1)
+    # every channel receives a copy
+    assert a.body == b.body == b"message"
+
+
+async def test_rollback_redelivers():
+    client = almanet.clients.local_client()
+    stream, stop = await client.consume("topic", "main")
+
+    await client.produce("topic", b"message", delay=0)
+
+    async with asyncio.timeout(1):
+        [first] = await _take(stream, 1)
+        await first.rollback()
+        [second] = await _take(stream, 1)
+        await second.commit()
+    assert first.id == second.id
+    assert second.attempts == first.attempts + 1
+    stop()
+
+
+async def test_delay():
+    client = almanet.clients.local_client()
+    stream, _ = await client.consume("topic", "main")
+
+    loop = asyncio.get_running_loop()
+    begin_time = loop.time()
+    await client.produce("topic", b"message", delay=100)
+    async with asyncio.timeout(1):
+        await _take(stream, 1)
+    assert loop.time() - begin_time >= 0.1
+
+
+async def test_loss():
+    client = almanet.clients.local_client(loss=1)
+    await client.produce("topic", b"message", delay=0)
+    assert len(client.broker.get_topic("topic").backlog) == 0
+
+
+async def greet(
+    payload: bytes,
+    **kwargs,
+) -> bytes:
+    return b"Hello, " + payload
+
+
+async def test_session_rpc():
+    session = almanet.clients.make_local_session()
+    async with session:
+        session.register("net.example.greet", greet)
+        result = await session.call("net.example.greet", "Almanet")
+        assert result.payload == b'Hello, "Almanet"'
+
+
+async def test_batching():
+    batches = []
+    client = almanet.clients.local_client(batch_window=0.01)
+    produce_many = client.produce_many
+
+    async def spy(topic, messages):
+        batches.append(len(messages))
+        await produce_many(topic, messages)
+
+    client.produce_many = spy
+    await client.connect()
+    stream, _ = await client.consume("topic", "main", max_in_flight=8)
+
+    async with asyncio.timeout(1):
+        await asyncio.gather(*[client.produce("topic", b"message", delay=0) for _ in range(8)])
+        messages = await _take(stream, 8)
+    assert batches == [8]
+    assert len(messages) == 8
+    await client.close()
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+import almanet
+from almanet import _shared
+
+
+def test_prometheus_text():
+    registry = _shared.metrics_registry()
+    registry.counter("requests_total", "Requests").inc(uri="a")
+    registry.gauge("depth", function=lambda: 3)
+    duration = registry.histogram("duration_seconds", buckets=(0.1, 1))
+    duration.observe(0.05, uri="a")
+    duration.observe(0.5, uri="a")
+
+    text = registry.to_prometheus()
+    assert "# HELP requests_total Requests" in text
+    assert 'requests_total{uri="a"} 1' in text
+    assert "depth 3" in text
+    assert 'duration_seconds_bucket{uri="a",le="0.1"} 1' in text
+    assert 'duration_seconds_bucket{uri="a",le="1.0"} 2' in text
+    assert 'duration_seconds_bucket{uri="a",le="+Inf"} 2' in text
+    assert 'duration_seconds_count{uri="a"} 2' in text
+
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total")
+
+
+async def echo(payload, **kwargs):
+    return payload
+
+
+async def fail(payload, **kwargs):
+    raise almanet.rpc_exception(name="failed")
+
+
+async def test_session_metrics():
+    async with almanet.clients.make_local_session() as session:
+        session.register("net.example.echo", echo)
+        session.register("net.example.fail", fail)
+        await session.call("net.example.echo", "test")
+        with pytest.raises(almanet.rpc_exception):
+            await session.call("net.example.fail", None)
+
+        snapshot = session.metrics.snapshot()
+        call_samples = {i["labels"]["uri"]: i for i in snapshot["almanet_call_duration_seconds"]["samples"]}
+        assert call_samples["net.example.echo"]["count"] == 1
+        assert snapshot["almanet_execute_errors_total"]["samples"] == [
+            {"labels": {"error": "failed", "uri": "net.example.fail"}, "value": 1}
+        ]
+        assert session.metrics.get("almanet_invocations_in_flight").value(uri="net.example.echo") == 0  # type: ignore
+        assert session.metrics.get("almanet_pending_replies").value() == 0  # type: ignore
+        assert session.metrics.get("almanet_consumer_lag_seconds").value(topic="net.example.echo") == 1  # type: ignore
+
+        server = await session.serve_metrics(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        assert response.startswith(b"HTTP/1.1 200 OK")
+        assert b'almanet_call_errors_total{error="failed",uri="net.example.fail"} 1' in response
+
+
+async def test_consumer_lag_of_saturated_consumer():
+    async with almanet.clients.make_local_session() as session:
+        release = asyncio.Event()
+
+        async def blocked(payload, **kwargs):
+            await release.wait()
+            return payload
+
+        session.register("net.example.blocked", blocked, concurrency=1)
+        calls = [session.call("net.example.blocked", i, timeout=5) for i in range(2)]
+        await asyncio.sleep(0.2)
+        # nothing was delivered after the first invocation, the report keeps growing
+        first = session._metrics.take_consumer_lag("net.example.blocked")
+        await asyncio.sleep(0.2)
+        second = session._metrics.take_consumer_lag("net.example.blocked")
+        assert 0.1 <= first < second
+
+        release.set()
+        await asyncio.gather(*calls)
+        session._metrics.take_consumer_lag("net.example.blocked")
+        assert session._metrics.take_consumer_lag("net.example.blocked") == 0
@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+import almanet
+from almanet import _autoscaling
+
+multiplexed_service = almanet.remote_service("net.testing.multiplexed", multiplexed=True)
+
+active = 0
+max_active = 0
+
+
+@multiplexed_service.procedure
+async def greet(
+    payload: str,
+    **kwargs,
+) -> str:
+    return f"Hello, {payload}!"
+
+
+@multiplexed_service.procedure(concurrency=1)
+async def exclusive(
+    payload: int,
+    **kwargs,
+) -> int:
+    global active, max_active
+    active += 1
+    max_active = max(active, max_active)
+    await asyncio.sleep(0.01)
+    active -= 1
+    return payload
+
+
+notified = asyncio.Queue()
+
+
+@multiplexed_service.procedure
+async def notify(
+    payload: str,
+    **kwargs,
+) -> None:
+    notified.put_nowait(payload)
+
+
+@multiplexed_service.procedure(channel="other")
+async def other_channel(
+    payload: int,
+    **kwargs,
+) -> int:
+    return payload
+
+
+def _consumers(
+    session: almanet.Almanet,
+    prefixes: tuple[str, ...] = ("net.testing.multiplexed", "_service_.net.testing.multiplexed"),
+) -> dict[str, int]:
+    broker = session._client.broker  # type: ignore
+    return {
+        name: sum(len(channel.consumers) for channel in topic.channels.values())
+        for name, topic in broker.topics.items()
+        if name.startswith(tuple(f"_rpc_.{i}" for i in prefixes))
+    }
+
+
+async def test_multiplexed_service():
+    async with almanet.clients.make_local_session() as session:
+        await multiplexed_service._post_join_event.notify(session)
+        await asyncio.sleep(0.01)
+
+        # one consumer for the default channel, procedures on other channels keep their own
+        assert _consumers(session) == {
+            "_rpc_._service_.net.testing.multiplexed": 1,
+            "_rpc_.net.testing.multiplexed.other_channel": 1,
+        }
+
+        assert await greet("Almanet", force_local=False) == "Hello, Almanet!"
+        assert await other_channel(1, force_local=False) == 1
+        assert await greet.call_many(["a", "b"]) == ["Hello, a!", "Hello, b!"]
+
+        # the concurrency of each procedure is kept
+        assert await asyncio.gather(*[exclusive(i, force_local=False) for i in range(4)]) == [0, 1, 2, 3]
+        assert max_active == 1
+
+        # executions are reported by the procedure
+        execute_duration = session.metrics.get("almanet_execute_duration_seconds")
+        assert execute_duration.value(uri=exclusive.uri) == 4  # type: ignore
+
+        # invocations by uri are routed through the service topic too
+        session.delay_call(notify.uri, "later")
+        await session.delay_call_when_ready(notify.uri, "when ready")
+        async with asyncio.timeout(1):
+            assert [await notified.get(), await notified.get()] == ["later", "when ready"]
+
+        replies = await session.multicall(greet.uri, "all", timeout=0.1)
+        assert [i.payload for i in replies] == [b'"Hello, all!"']
+        replies = [i async for i in session.iter_multicall(greet.uri, "all", timeout=0.1)]
+        assert len(replies) == 1
+
+        with pytest.raises(almanet.rpc_exception) as e:
+            await session.call("net.testing.multiplexed.unknown", None, via=multiplexed_service.multiplexed_uri)
+        assert e.value.name == "procedure_not_found"
+
+
+async def test_multiplexed_framed_envelopes():
+    session = almanet.Almanet(almanet.clients.local_client(), framed_envelopes=True)
+    async with session:
+        await multiplexed_service._post_join_event.notify(session)
+        assert await greet("Almanet", force_local=False) == "Hello, Almanet!"
+
+
+async def test_multiplexed_consumer_lag():
+    class shared_value:
+        value = 0.0
+
+    consumer_lag = shared_value()
+    async with almanet.clients.make_local_session() as session:
+        await multiplexed_service._post_join_event.notify(session)
+        _autoscaling._report_consumer_lag(session, multiplexed_service, consumer_lag, 0.005)
+
+        # invocations waiting for the only slot of the procedure are reported by the service topic
+        calls = asyncio.gather(*[exclusive(i, force_local=False) for i in range(4)])
+        reported = 0.0
+        while not calls.done():
+            reported = max(reported, consumer_lag.value)
+            await asyncio.sleep(0.001)
+        await calls
+        assert reported > 0
+    # the report loop stops once the session has left
+    await asyncio.sleep(0.01)
+
+
+documented_service = almanet.remote_service("net.testing.documented", multiplexed=True)
+
+
+@documented_service.procedure(include_to_api=True)
+async def first(
+    payload: str,
+    **kwargs,
+) -> str:
+    return payload
+
+
+@documented_service.procedure(include_to_api=True)
+async def second(
+    payload: int,
+    **kwargs,
+) -> int:
+    return payload
+
+
+async def test_multiplexed_schema():
+    async with almanet.clients.make_local_session() as session:
+        await documented_service._post_join_event.notify(session)
+        await asyncio.sleep(0.01)
+
+        # one consumer for the invocations and one for the schemas of all procedures
+        prefixes = (
+            "net.testing.documented",
+            "_service_.net.testing.documented",
+            "_schema_._service_.net.testing.documented",
+        )
+        assert _consumers(session, prefixes) == {
+            "_rpc_._service_.net.testing.documented": 1,
+            "_rpc_._schema_._service_.net.testing.documented.almanet.python": 1,
+        }
+
+        schema = await session.call(f"_schema_.{documented_service.multiplexed_uri}.almanet.python", None)
+        procedures = almanet.shared.serialize_any_json(schema.payload)["procedures"]
+        assert [i["uri"] for i in procedures] == [first.uri, second.uri]
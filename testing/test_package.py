@@ -0,0 +1,182 @@
+import http.server
+import json
+import multiprocessing
+import os
+import pathlib
+import signal
+import threading
+import time
+
+import almanet
+
+crashing_service = almanet.remote_service("net.testing.crashing", workers=2)
+
+
+@crashing_service.post_join
+def _crash_once(session: almanet.Almanet) -> None:
+    directory = pathlib.Path(os.environ["ALMANET_TEST_DIRECTORY"])
+    (directory / f"{os.getpid()}.started").touch()
+    try:
+        (directory / "crashed").touch(exist_ok=False)
+    except FileExistsError:
+        return
+    os._exit(1)
+
+
+def _supervise(directory: str) -> None:
+    os.environ["ALMANET_TEST_DIRECTORY"] = directory
+    almanet.serve_multiple(
+        almanet.clients.local_client(),
+        crashing_service,
+        start_method="fork",
+        restart_backoff=0.1,
+        shutdown_timeout=5,
+    )
+
+
+def test_serve_multiple_restarts_workers(tmp_path: pathlib.Path):
+    supervisor = multiprocessing.get_context("fork").Process(target=_supervise, args=(str(tmp_path),))
+    supervisor.start()
+    try:
+        deadline = time.monotonic() + 10
+        # two workers and one restarted after the crash
+        while len(list(tmp_path.glob("*.started"))) < 3:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert (tmp_path / "crashed").exists()
+
+        os.kill(supervisor.pid, signal.SIGTERM)  # type: ignore
+        supervisor.join(10)
+        assert supervisor.exitcode == 0
+    finally:
+        if supervisor.is_alive():
+            supervisor.kill()
+
+
+scalable_service = almanet.remote_service("net.testing.scalable", workers=1, max_workers=3)
+
+
+@scalable_service.procedure
+async def idle(payload: str, **kwargs) -> str:
+    return payload
+
+
+multiplexed_scalable_service = almanet.remote_service("net.testing.scalable_multiplexed", multiplexed=True)
+
+
+@multiplexed_scalable_service.procedure
+async def multiplexed_idle(payload: str, **kwargs) -> str:
+    return payload
+
+
+@scalable_service.post_join
+def _mark_started(session: almanet.Almanet) -> None:
+    directory = pathlib.Path(os.environ["ALMANET_TEST_DIRECTORY"])
+    (directory / f"{os.getpid()}.started").touch()
+
+
+def _file_backlog_probe(service, consumer_lags):
+    directory = pathlib.Path(os.environ["ALMANET_TEST_DIRECTORY"])
+    return float((directory / "backlog").read_text())
+
+
+def _supervise_scalable(directory: str) -> None:
+    os.environ["ALMANET_TEST_DIRECTORY"] = directory
+    almanet.serve_multiple(
+        almanet.clients.local_client(),
+        scalable_service,
+        start_method="fork",
+        shutdown_timeout=5,
+        autoscaling=almanet.autoscaling_model(
+            _file_backlog_probe,
+            scale_up_threshold=10,
+            interval=0.05,
+            cooldown=0.1,
+        ),
+    )
+
+
+def _count_workers(supervisor: multiprocessing.Process) -> int:
+    # direct children of the supervisor
+    return sum(1 for i in pathlib.Path("/proc").glob("[0-9]*/stat") if _parent_pid(i) == supervisor.pid)
+
+
+def _parent_pid(stat_path: pathlib.Path) -> int | None:
+    try:
+        return int(stat_path.read_text().rsplit(")", 1)[1].split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _wait_until(condition, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_serve_multiple_autoscaling(tmp_path: pathlib.Path):
+    (tmp_path / "backlog").write_text("100")
+    supervisor = multiprocessing.get_context("fork").Process(target=_supervise_scalable, args=(str(tmp_path),))
+    supervisor.start()
+    try:
+        _wait_until(lambda: len(list(tmp_path.glob("*.started"))) == 3)
+        time.sleep(0.2)
+        # bounded by max_workers
+        assert len(list(tmp_path.glob("*.started"))) == 3
+
+        (tmp_path / "backlog").write_text("0")
+        _wait_until(lambda: _count_workers(supervisor) == 1)
+
+        os.kill(supervisor.pid, signal.SIGTERM)  # type: ignore
+        supervisor.join(10)
+        assert supervisor.exitcode == 0
+    finally:
+        if supervisor.is_alive():
+            supervisor.kill()
+
+
+def test_nsqd_stats_probe():
+    stats = {
+        "topics": [
+            {
+                "topic_name": "_rpc_._service_.net.testing.scalable_multiplexed",
+                "depth": 0,
+                "channels": [{"channel_name": "almanet.python", "depth": 3}],
+            },
+            {
+                "topic_name": "_rpc_.net.testing.scalable.idle",
+                "depth": 2,
+                "channels": [
+                    {"channel_name": "almanet.python", "depth": 5},
+                    {"channel_name": "other", "depth": 100},
+                ],
+            },
+            {"topic_name": "_rpc_.net.testing.unrelated", "depth": 100, "channels": []},
+        ]
+    }
+
+    class handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            assert self.path.startswith("/stats")
+            body = json.dumps(stats).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        probe = almanet.nsqd_stats_probe(f"127.0.0.1:{server.server_port}")
+        assert probe(scalable_service, []) == 7
+        # procedures of a multiplexed service are counted by the topic of the service
+        assert probe(multiplexed_scalable_service, []) == 3
+    finally:
+        server.shutdown()
+
+    assert almanet.nsqd_stats_probe("127.0.0.1:1", timeout=0.1)(scalable_service, []) is None
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import almanet
+from almanet import _service
+
+cached_service = almanet.remote_service("net.testing.cached")
+
+executions = 0
+
+
+@cached_service.procedure(cache=almanet.shared.result_cache(maxsize=2, ttl=60))
+async def lookup(
+    payload: str,
+    **kwargs,
+) -> str:
+    global executions
+    executions += 1
+    return payload.upper()
+
+
+def test_result_cache(monkeypatch):
+    cache = almanet.shared.result_cache(maxsize=2, ttl=1)
+    cache.set(b"a", 1)
+    cache.set(b"b", 2)
+    assert cache.get(b"a") == (True, 1)
+    # "b" is the least recently used
+    assert cache.set(b"c", 3) == 1
+    assert cache.get(b"b") == (False, None)
+
+    generation = cache.generation
+    cache.clear()
+    cache.set(b"a", 1, generation)
+    assert len(cache) == 0
+
+    cache.set(b"a", 1)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+    assert cache.get(b"a") == (False, None)
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 2, 1)
+
+
+async def test_cached_procedure():
+    global executions
+    executions = 0
+    async with almanet.clients.make_local_session() as session:
+        await cached_service._post_join_event.notify(session)
+
+        assert await lookup("a", force_local=False) == "A"
+        assert await lookup("a", force_local=False) == "A"
+        assert executions == 1
+        assert session.metrics.get("almanet_result_cache_hits_total").value(uri=lookup.uri) == 1  # type: ignore
+
+        # cleared at once in this process
+        await lookup.invalidate_cache()
+        assert await lookup("a", force_local=False) == "A"
+        assert executions == 2
+
+        # other processes receive the invalidation through the broker
+        await session.produce(_service.CACHE_INVALIDATION_TOPIC, lookup.uri)
+        await asyncio.sleep(0.05)
+        assert await lookup("a", force_local=False) == "A"
+        assert executions == 3
+
+        await lookup("b", force_local=False)
+        await lookup("c", force_local=False)
+        assert session.metrics.get("almanet_result_cache_evictions_total").value(uri=lookup.uri) == 1  # type: ignore
@@ -81,3 +81,20 @@ async def test_rpc(
         assert test_duration < 1
 
     await asyncio.sleep(1)
+
+
+async def test_batched_acknowledgements(
+    n=256,  # number of calls
+):
+    session = almanet.clients.make_ansqd_tcp_session("localhost:4150", ack_window=0.001)
+    async with session:
+        session.register(GREET_URI, greet, concurrency=32)
+
+        replies = await asyncio.gather(*[session.call(GREET_URI, f"user{i}") for i in range(n)])
+        assert [i.payload for i in replies] == [f"Hello, user{i}!".encode() for i in range(n)]
+
+        # acknowledged invocations are not redelivered
+        await asyncio.sleep(1)
+        assert session.metrics.get("almanet_redelivered_messages_total").value(topic=f"_rpc_.{GREET_URI}") == 0  # type: ignore
+
+    await asyncio.sleep(1)
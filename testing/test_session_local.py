@@ -0,0 +1,341 @@
+import asyncio
+
+import pytest
+
+import almanet
+
+
+async def test_max_in_flight():
+    max_in_flight = 4
+    active = 0
+    max_active = 0
+    done = asyncio.Event()
+    n = 32
+    executed = 0
+
+    async def slow(payload, **kwargs):
+        nonlocal active, max_active, executed
+        active += 1
+        max_active = max(active, max_active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        executed += 1
+        if executed == n:
+            done.set()
+        return b""
+
+    async with almanet.clients.make_local_session() as session:
+        registration = session.register("net.example.slow", slow, max_in_flight=max_in_flight)
+        for _ in range(n):
+            session.delay_call(registration.uri, None)
+        async with asyncio.timeout(5):
+            await done.wait()
+
+    assert max_active == max_in_flight
+
+
+async def test_concurrency():
+    concurrency = 4
+    active = 0
+    max_active = 0
+
+    async def slow(payload, **kwargs):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(active, max_active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return payload
+
+    async with almanet.clients.make_local_session() as session:
+        session.register("net.example.slow", slow, concurrency=concurrency)
+        await asyncio.gather(*[session.call("net.example.slow", i) for i in range(16)])
+
+    assert max_active == concurrency
+
+
+async def test_deadline():
+    async def slow(payload, **kwargs):
+        await asyncio.sleep(1)
+        return b""
+
+    async with almanet.clients.make_local_session() as session:
+        registration = session.register("net.example.slow", slow)
+
+        # the worker is busy with the first invocation when the second one expires
+        calls = [session.call(registration.uri, None, timeout=0.1) for _ in range(2)]  # type: ignore
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        assert all(isinstance(r, TimeoutError) for r in results)
+        await asyncio.sleep(0.2)
+
+        assert session.cancelled_invocations == 1
+        assert session.dropped_invocations == 1
+
+
+async def echo(payload, **kwargs):
+    return payload
+
+
+async def test_multicall_expected():
+    peers = 3
+    async with almanet.clients.make_local_session() as session:
+        for i in range(peers):
+            session.register("net.example.echo", echo, channel=f"peer{i}")
+
+        loop = asyncio.get_running_loop()
+        begin_time = loop.time()
+        result = await session.multicall("net.example.echo", "test", timeout=5, expected=peers)  # type: ignore
+        assert len(result) == peers
+        assert loop.time() - begin_time < 1
+
+        broker = session._client.broker  # type: ignore
+        topics_count = len(broker.topics)
+
+        replies = [i async for i in session.iter_multicall("net.example.echo", "test", timeout=0.1)]  # type: ignore
+        assert len(replies) == peers
+        # replies are routed through the session reply topic
+        assert len(broker.topics) == topics_count
+
+
+async def test_outbound_backpressure():
+    client = almanet.clients.local_client(latency=0.01)
+    session = almanet.Almanet(client, outbound_high_water=4, outbound_low_water=1)
+    async with session:
+        tasks = [session.produce("net.example.topic", i) for i in range(4)]
+        assert session.outbound_queue_depth == 4
+
+        with pytest.raises(almanet.outbound_queue_full):
+            session.produce("net.example.topic", 4)
+
+        async with asyncio.timeout(1):
+            tasks.append(await session.produce_when_ready("net.example.topic", 4))
+        # resumed at low water mark
+        assert session.outbound_queue_depth == 2
+
+        await asyncio.gather(*tasks)
+        assert session.outbound_queue_depth == 0
+
+
+async def test_framed_envelopes():
+    received = []
+
+    async def echo_view(payload, **kwargs):
+        received.append(payload)
+        return payload
+
+    async def fail(payload, **kwargs):
+        raise almanet.rpc_exception("test", name="failed")
+
+    session = almanet.Almanet(almanet.clients.local_client(), framed_envelopes=True)
+    async with session:
+        session.register("net.example.echo_view", echo_view)
+        session.register("net.example.fail", fail)
+
+        result = await session.call("net.example.echo_view", "test")
+        assert result.payload == b'"test"'
+        assert isinstance(received[0], memoryview)
+
+        with pytest.raises(almanet.rpc_exception) as exc_info:
+            await session.call("net.example.fail", None)
+        assert exc_info.value.name == "failed"
+
+
+async def test_framed_discover_peers():
+    async def echo(payload, **kwargs):
+        return payload
+
+    session = almanet.Almanet(almanet.clients.local_client(), framed_envelopes=True)
+    async with session:
+
+        async def schema(payload, **kwargs):
+            return almanet.shared.dump({"routes": ["net.example.echo:almanet.python"]})
+
+        session.register("_schema_.client", schema, channel=session.id)
+        session.register("net.example.echo", echo)
+
+        assert await session.discover_peers("net.example.echo", timeout=0.2) == 1
+        replies = await session.multicall("net.example.echo", "test", timeout=0.5, expected="discover")
+        assert [i.payload for i in replies] == [b'"test"']
+
+
+async def test_discover_within_multicall_timeout():
+    async def echo(payload, **kwargs):
+        return payload
+
+    async with almanet.clients.make_local_session() as session:
+        session.register("net.example.echo", echo)
+
+        loop = asyncio.get_running_loop()
+        begin_time = loop.time()
+        # the peer does not share its schema, the multicall waits for replies until the timeout
+        replies = await session.multicall("net.example.echo", "test", timeout=0.2, expected="discover")
+        assert [i.payload for i in replies] == [b'"test"']
+        assert loop.time() - begin_time < 0.3
+
+
+async def test_coalesced_calls():
+    executions = 0
+    release = asyncio.Event()
+
+    async def slow_lookup(payload, **kwargs):
+        nonlocal executions
+        executions += 1
+        await release.wait()
+        if payload == b'"missing"':
+            raise almanet.rpc_exception(payload, name="not_found")
+        return payload
+
+    async with almanet.clients.make_local_session() as session:
+        session.register("net.example.lookup", slow_lookup)
+
+        calls = [session.call("net.example.lookup", "a", coalesce=True) for _ in range(100)]
+        failing = [session.call("net.example.lookup", "missing", coalesce=True) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        release.set()
+        replies = await asyncio.gather(*calls)
+        assert {i.payload for i in replies} == {b'"a"'}
+        for i in failing:
+            with pytest.raises(almanet.rpc_exception):
+                await i
+        assert executions == 2
+        assert session.metrics.get("almanet_coalesced_calls_total").value(uri="net.example.lookup") == 100  # type: ignore
+
+        # a cancelled waiter does not affect the others
+        release.clear()
+        cancelled = session.call("net.example.lookup", "b", coalesce=True)
+        waiting = session.call("net.example.lookup", "b", coalesce=True)
+        await asyncio.sleep(0.05)
+        cancelled.cancel()
+        release.set()
+        assert (await waiting).payload == b'"b"'
+
+        # once every waiter is cancelled, the next call starts over
+        release.clear()
+        cancelled = session.call("net.example.lookup", "c", coalesce=True)
+        await asyncio.sleep(0.05)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert len(session._flights) == 0
+        release.set()
+        assert (await session.call("net.example.lookup", "c", coalesce=True)).payload == b'"c"'
+
+
+async def test_call_many():
+    active = 0
+    max_active = 0
+
+    async def square(payload, **kwargs):
+        nonlocal active, max_active
+        payload = int(payload)
+        active += 1
+        max_active = max(active, max_active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if payload < 0:
+            raise almanet.rpc_exception(payload, name="negative")
+        if payload == 0:
+            await asyncio.sleep(1)
+        return str(payload * payload).encode()
+
+    async with almanet.clients.make_local_session() as session:
+        session.register("net.example.square", square, concurrency=8)
+
+        produced = []
+        produce_many = session._client.produce_many
+
+        async def counting_produce_many(topic, messages):
+            produced.append(len(messages))
+            await produce_many(topic, messages)
+
+        session._client.produce_many = counting_produce_many  # type: ignore
+
+        replies = await session.call_many("net.example.square", range(1, 101))
+        assert [int(i.payload) for i in replies] == [i * i for i in range(1, 101)]  # type: ignore
+        # published in one round trip
+        assert produced == [100]
+        assert len(session._pending_multicalls) == 0
+
+        produced.clear()
+        max_active = 0
+        results = [i async for i in session.iter_call_many("net.example.square", [1, -1, 2, 3], concurrency=2)]
+        assert max_active == 2
+        assert sum(produced) == 4
+        assert sorted(i for i, _ in results) == [0, 1, 2, 3]
+        errors = {i: result for i, result in results if isinstance(result, Exception)}
+        assert list(errors) == [1]
+        assert errors[1].name == "negative"  # type: ignore
+
+        # invocations without a reply fail with a timeout, the others complete
+        replies = await session.call_many("net.example.square", [0, 2], timeout=0.2)
+        assert isinstance(replies[0], TimeoutError)
+        assert replies[1].payload == b"4"  # type: ignore
+
+
+async def test_reply_shards():
+    session = almanet.Almanet(almanet.clients.local_client(), reply_shards=4)
+    async with session:
+        session.register("net.example.echo", echo, concurrency=16)
+        replies = await asyncio.gather(*[session.call("net.example.echo", i) for i in range(100)])
+        assert [i.payload for i in replies] == [str(i).encode() for i in range(100)]
+
+        replies_total = session.metrics.get("almanet_replies_total")
+        assert [replies_total.value(shard=str(i)) for i in range(4)] == [25, 25, 25, 25]  # type: ignore
+
+        results = await session.call_many("net.example.echo", range(8))
+        assert not any(isinstance(i, Exception) for i in results)
+
+        await asyncio.sleep(0)
+        commits_pending = session.metrics.get("almanet_reply_commits_pending")
+        assert sum(commits_pending.value(shard=str(i)) for i in range(4)) == 0  # type: ignore
+
+    with pytest.raises(ValueError):
+        almanet.Almanet(almanet.clients.local_client(), reply_shards=0)
+
+
+async def test_pipelined_reply_commits():
+    session = almanet.clients.make_local_session()
+    consume = session.consume
+    max_pending = 0
+
+    async def consume_with_slow_commits(topic, channel, **kwargs):
+        messages_stream, stop_consumer = await consume(topic, channel, **kwargs)
+        if topic not in session.reply_topics:
+            return messages_stream, stop_consumer
+
+        async def slow_commits():
+            async for message in messages_stream:
+                commit = message.commit
+
+                async def slow_commit(commit=commit):
+                    nonlocal max_pending
+                    pending = session.metrics.get("almanet_reply_commits_pending").value(shard="0")  # type: ignore
+                    max_pending = max(max_pending, pending)
+                    await asyncio.sleep(0.005)
+                    await commit()
+
+                message.commit = slow_commit
+                yield message
+
+        return slow_commits(), stop_consumer
+
+    session.consume = consume_with_slow_commits  # type: ignore
+    async with session:
+        session.register("net.example.echo", echo, concurrency=64)
+        loop = asyncio.get_running_loop()
+        begin_time = loop.time()
+        await asyncio.gather(*[session.call("net.example.echo", i) for i in range(200)])
+        # 200 sequential commits would take a second
+        assert loop.time() - begin_time < 0.5
+        assert max_pending > 1
+
+
+def test_log_payload_truncation():
+    invocation = almanet.invoke_event_model(id="test", caller_id="test", payload=b"x" * 4096, reply_topic="")
+    text = repr(invocation)
+    assert "(4096 bytes)" in text
+    assert len(text) < 300
+
+    sampler = almanet.shared.log_sampler(10)
+    sampled = [sampler.sampled(almanet.shared.new_id()) for _ in range(1000)]
+    assert 0 < sum(sampled) < 1000
+    assert sampler.sampled("test") == sampler.sampled("test")
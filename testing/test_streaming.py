@@ -1,5 +1,7 @@
 import asyncio
 
+import pytest
+
 from almanet._shared._streaming import make_closable
 
 
@@ -18,3 +20,44 @@ async def test_make_closable():
         async for v in closable_stream:
             if v > 32:
                 close()
+
+
+async def test_close_while_waiting():
+    closed = asyncio.Event()
+
+    async def stream():
+        yield 0
+        await asyncio.sleep(60)
+        yield 1
+
+    async def on_close():
+        closed.set()
+
+    closable_stream, close = make_closable(stream(), on_close, transform=lambda v: v + 1)
+
+    async def consume():
+        return [v async for v in closable_stream]
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)
+    close()
+    async with asyncio.timeout(1):
+        assert await task == [1]
+        await closed.wait()
+
+
+async def test_cancel_consumer():
+    async def stream():
+        await asyncio.sleep(60)
+        yield 0
+
+    closable_stream, _ = make_closable(stream())
+
+    async def consume():
+        return [v async for v in closable_stream]
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
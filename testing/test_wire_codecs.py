@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pydantic
+import pytest
+
+import almanet
+
+pytest.importorskip("msgpack")
+
+binary_service = almanet.remote_service("net.testing.binary")
+
+
+class file_model(pydantic.BaseModel):
+    name: str
+    content: bytes
+    created_at: datetime
+
+
+class file_not_found(almanet.remote_exception):
+    payload: str
+
+
+@binary_service.procedure(
+    content_type=almanet.shared.MSGPACK_CONTENT_TYPE,
+    exceptions={file_not_found},
+)
+async def read_file(
+    payload: str,
+    session: almanet.Almanet,
+) -> file_model:
+    if payload == "missing":
+        raise file_not_found(payload)
+    return file_model(name=payload, content=bytes(range(256)), created_at=datetime(2024, 1, 1))
+
+
+def test_msgpack_codec():
+    codec = almanet.shared.msgpack_codec
+    invocation = almanet.invoke_event_model(id="1", caller_id="2", payload=b"\xff\x00", reply_topic="")
+    data = codec.encode(invocation)
+    assert almanet.shared.detect_wire_codec(data) is codec
+    assert codec.decode(data, almanet.invoke_event_model) == invocation
+
+
+async def test_msgpack_procedure():
+    async with almanet.clients.make_local_session() as session:
+        await binary_service._post_join_event.notify(session)
+
+        result = await read_file("a.bin", force_local=False)
+        assert result.content == bytes(range(256))
+        assert result.created_at == datetime(2024, 1, 1)
+
+        with pytest.raises(file_not_found):
+            await read_file("missing", force_local=False)
+
+        # the reply is encoded in the format of the invocation
+        with pytest.raises(almanet.rpc_exception) as e:
+            await session.call(read_file.uri, "missing")
+        assert e.value.content_type == almanet.shared.JSON_CONTENT_TYPE
+        assert e.value.payload == b'"missing"'
+
+
+def test_msgpack_required(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(almanet.shared._wire_codecs, "msgpack", None)
+
+    async def noop(payload: str, **kwargs) -> str:
+        return payload
+
+    with pytest.raises(RuntimeError):
+        binary_service.add_procedure(noop, content_type=almanet.shared.MSGPACK_CONTENT_TYPE)